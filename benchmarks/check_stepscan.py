@@ -0,0 +1,271 @@
+# (CC0) balaji.work
+# Differential check of the streaming STEP scanner (ifc2csv/stepscan.py) against ifcopenshell:
+# writes small models full of STEP edge cases, extracts each with both readers under several
+# entity-type and property filters, and reports any row that differs, e.g.
+#   python benchmarks/check_stepscan.py
+#   python benchmarks/check_stepscan.py --keep /tmp/stepscan-cases path/to/model.ifc
+# Rows must match exactly, value types included (3 is not 3.0). Models the scanner must refuse
+# (complex instances) are expected to raise ValueError. Every model is also scanned with tiny
+# read chunks, so statements, strings and comments straddle the chunk boundaries.
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "ifc2csv"))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import stepscan  # noqa: E402
+import synthetic  # noqa: E402
+from ifc2csv import iter_ifc_properties  # noqa: E402
+
+# Entity-type and property filters every model is extracted with
+ENTITY_FILTERS = (None, {"IfcWall"}, {"IfcDoor", "IfcBeam"}, {"IfcBuildingElementProxy"}, {"IfcSlab"})
+PROPERTY_FILTERS = (None, {"Mat", "Count", "Flag", "Escaped"})
+
+# Read chunk sizes the scanner is run with; 7 bytes splits nearly every token across reads
+READ_CHUNKS = (stepscan.READ_CHUNK, 7)
+
+_HEADER = ("ISO-10303-21;\nHEADER;\nFILE_DESCRIPTION(('ViewDefinition [CoordinationView]'),'2;1');\n"
+           "FILE_NAME('case.ifc','2000-01-01T00:00:00',(''),(''),'x','x','');\n"
+           "FILE_SCHEMA(('{schema}'));\nENDSEC;\n")
+
+# Building elements shared by the IFC2X3 cases: #10 door, #11 wall standard case, #12 wall with
+# no name, #13 beam, #14 proxy, #15 wall with no property sets
+_IFC2X3_ELEMENTS = """#1=IFCPROJECT('0YvctVUKr0kugbFTf53O9L',$,'P',$,$,$,$,$,$);
+#10=IFCDOOR('1YvctVUKr0kugbFTf53O9L',$,'D\\X2\\00F800D8\\X0\\r 1',$,$,$,$,$,$,$);
+#11=IFCWALLSTANDARDCASE('2YvctVUKr0kugbFTf53O9L',$,'W it''s',$,$,$,$,$);
+#12=IFCWALL('3YvctVUKr0kugbFTf53O9L',$,$,$,$,$,$,$);
+#13=IFCBEAM('4YvctVUKr0kugbFTf53O9L',$,'B;1',$,$,$,$,$);
+#14=IFCBUILDINGELEMENTPROXY('5YvctVUKr0kugbFTf53O9L',$,'P/*1*/',$,$,$,$,$,$);
+#15=IFCWALL('6YvctVUKr0kugbFTf53O9L',$,'Bare',$,$,$,$,$);
+"""
+
+# Property sets for the elements above: #30 is shared by every element but #15, #31 by the
+# door and wall, and later sets win on the duplicate name "Mat"
+_IFC2X3_PROPERTIES = """#20=IFCPROPERTYSINGLEVALUE('Volume',$,IFCVOLUMEMEASURE(12.),$);
+#21=IFCPROPERTYSINGLEVALUE('Mat',$,IFCLABEL('St\\X2\\00E5\\X0\\l;x'),$);
+#22=IFCPROPERTYSINGLEVALUE('Count',$,IFCINTEGER(3),$);
+#23=IFCPROPERTYSINGLEVALUE('Flag',$,IFCBOOLEAN(.T.),$);
+#24=IFCPROPERTYENUMERATEDVALUE('Enum',$,(IFCLABEL('A')),$);
+#25=IFCPROPERTYSINGLEVALUE('Mat',$,IFCLABEL('second'),$);
+#26=IFCPROPERTYSINGLEVALUE('Area',$,IFCAREAMEASURE(1.5E2),$);
+#27=IFCPROPERTYSINGLEVALUE('Txt',$,IFCTEXT('multi
+line'),$);
+#28=IFCPROPERTYSINGLEVALUE('Unknown',$,IFCLOGICAL(.U.),$);
+#30=IFCPROPERTYSET('7YvctVUKr0kugbFTf53O9L',$,'PsetA',$,(#20,#21,#22,#23,#24,#28));
+#31=IFCPROPERTYSET('8YvctVUKr0kugbFTf53O9L',$,'PsetB',$,(#25,#26,#27));
+#40=IFCRELDEFINESBYPROPERTIES('9YvctVUKr0kugbFTf53O9L',$,$,$,(#10,#11,#12,#13,#14),#30);
+#41=IFCRELDEFINESBYPROPERTIES('AYvctVUKr0kugbFTf53O9L',$,$,$,(#11,#10),#31);
+"""
+
+
+def _model(schema, data):
+    return _HEADER.format(schema=schema) + "DATA;\n" + data + "ENDSEC;\nEND-ISO-10303-21;\n"
+
+
+# {case name: model text} for the models both readers must agree on, including on failing
+def edge_cases():
+    base = _IFC2X3_ELEMENTS + _IFC2X3_PROPERTIES
+    statements = [statement + ";" for statement in base.split(";\n") if statement.strip()]
+    cases = {"plain": _model("IFC2X3", base)}
+
+    # Every statement on one line, straight after DATA;
+    cases["one_line"] = _HEADER.format(schema="IFC2X3") + "DATA;" + "".join(statements) + "\nENDSEC;\nEND-ISO-10303-21;\n"
+
+    # Comments between, before and inside statements, holding ;, quotes and comment-like text
+    commented = []
+    for index, statement in enumerate(statements):
+        if index % 3 == 0:
+            commented.append(f"/* it's #{index}=IFCWALL('x'); */ {statement}")
+        elif index % 3 == 1:
+            commented.append(statement.replace(",$,", ",/* ; ' */$,", 1) + "/*x*/")
+        else:
+            commented.append(f"{statement}\n/*\nmulti-line ; comment\n*/")
+    cases["comments"] = _model("IFC2X3", "\n".join(commented) + "\n")
+
+    # Several statements per line, split mid-line by comments and blank lines
+    cases["several_per_line"] = _model("IFC2X3", "".join(
+        statement + (" " if index % 2 else "\n\n") for index, statement in enumerate(statements)) + "\n")
+
+    # String escapes: ; and quotes inside strings, \\, \X\, \X2\ pairs, \X4\, \S\ and \PA\
+    cases["strings"] = _model("IFC2X3", base + """#50=IFCPROPERTYSINGLEVALUE('Escaped',$,IFCLABEL('a;''b'';/*c*/\\\\d'),$);
+#51=IFCPROPERTYSINGLEVALUE('Latin',$,IFCLABEL('caf\\X\\E9 \\S\\e \\PA\\x'),$);
+#52=IFCPROPERTYSINGLEVALUE('Astral',$,IFCTEXT('\\X4\\0001F3D7\\X0\\ \\X2\\00C600E6\\X0\\'),$);
+#53=IFCPROPERTYSINGLEVALUE('Name;With''Quote',$,IFCIDENTIFIER(''),$);
+#54=IFCPROPERTYSET('BYvctVUKr0kugbFTf53O9L',$,'Pset;''C''',$,(#50,#51,#52,#53));
+#55=IFCRELDEFINESBYPROPERTIES('CYvctVUKr0kugbFTf53O9L',$,$,$,(#13,#14),#54);
+""")
+
+    # Logicals, booleans and numbers: value types must follow the literals
+    cases["values"] = _model("IFC2X3", base + """#60=IFCPROPERTYSINGLEVALUE('True',$,IFCLOGICAL(.T.),$);
+#61=IFCPROPERTYSINGLEVALUE('False',$,IFCBOOLEAN(.F.),$);
+#62=IFCPROPERTYSINGLEVALUE('Int',$,IFCCOUNTMEASURE(-7),$);
+#63=IFCPROPERTYSINGLEVALUE('Real',$,IFCREAL(-0.5E-3),$);
+#64=IFCPROPERTYSINGLEVALUE('Whole',$,IFCLENGTHMEASURE(3.),$);
+#65=IFCPROPERTYSINGLEVALUE('Big',$,IFCINTEGER(9007199254740993),$);
+#66=IFCPROPERTYSET('DYvctVUKr0kugbFTf53O9L',$,'Values',$,(#60,#61,#62,#63,#64,#65));
+#67=IFCRELDEFINESBYPROPERTIES('EYvctVUKr0kugbFTf53O9L',$,$,$,(#10,#12,#13),#66);
+""")
+
+    # Statements in reverse order: every reference points forward
+    cases["forward_references"] = _model("IFC2X3", "\n".join(reversed(statements)) + "\n")
+
+    # Type objects and quantities, which are not property sets of the elements
+    cases["types_and_quantities"] = _model("IFC2X3", base + """#70=IFCWALLTYPE('FYvctVUKr0kugbFTf53O9L',$,'WT',$,$,(#31),$,$,$,.STANDARD.);
+#71=IFCRELDEFINESBYTYPE('GYvctVUKr0kugbFTf53O9L',$,$,$,(#12,#15),#70);
+#72=IFCQUANTITYLENGTH('Length',$,$,2.5);
+#73=IFCELEMENTQUANTITY('HYvctVUKr0kugbFTf53O9L',$,'Qto',$,$,(#72));
+#74=IFCRELDEFINESBYPROPERTIES('IYvctVUKr0kugbFTf53O9L',$,$,$,(#15),#73);
+""")
+
+    # A property without a NominalValue, which neither reader can export
+    cases["missing_value"] = _model("IFC2X3", base + """#80=IFCPROPERTYSINGLEVALUE('Empty',$,$,$);
+#81=IFCPROPERTYSET('JYvctVUKr0kugbFTf53O9L',$,'Gaps',$,(#80));
+#82=IFCRELDEFINESBYPROPERTIES('KYvctVUKr0kugbFTf53O9L',$,$,$,(#14),#81);
+""")
+
+    # An IFC4 model, with its longer element attribute lists and a binary value
+    cases["ifc4"] = _model("IFC4", """#1=IFCPROJECT('0YvctVUKr0kugbFTf53O9L',$,'P',$,$,$,$,$,$);
+#10=IFCSLAB('1YvctVUKr0kugbFTf53O9L',$,'S',$,$,$,$,$,.FLOOR.);
+#11=IFCWALL('2YvctVUKr0kugbFTf53O9L',$,'W',$,$,$,$,$,$);
+#12=IFCDOOR('3YvctVUKr0kugbFTf53O9L',$,$,$,$,$,$,$,$,$,$,$,$);
+#20=IFCPROPERTYSINGLEVALUE('Bits',$,IFCBINARY("2F4"),$);
+#21=IFCPROPERTYSINGLEVALUE('Mat',$,IFCLABEL('\\X2\\00D8\\X0\\'),$);
+#22=IFCPROPERTYSINGLEVALUE('Count',$,IFCINTEGER(0),$);
+#23=IFCPROPERTYSINGLEVALUE('Flag',$,IFCLOGICAL(.U.),$);
+#30=IFCPROPERTYSET('7YvctVUKr0kugbFTf53O9L',$,'Pset_4',$,(#20,#21,#22,#23));
+#40=IFCRELDEFINESBYPROPERTIES('9YvctVUKr0kugbFTf53O9L',$,$,$,(#10,#11,#12),#30);
+""")
+    return cases
+
+
+# {case name: model text} for models the scanner must refuse with ValueError
+def refused_cases():
+    base = _IFC2X3_ELEMENTS + _IFC2X3_PROPERTIES
+    return {
+        "complex_instance": _model("IFC2X3", base + "#90=(IFCA()IFCB());\n"),
+        "complex_instance_on_shared_line": _model("IFC2X3", base.replace("#12=", "#91=(IFCA()IFCB('x;'));#12=", 1)),
+    }
+
+
+# Extract a model with one reader; returns (rows, columns, property names, property set names)
+def extract(path, entity_types, properties, lazy):
+    columns, property_names, property_sets = set(), set(), set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = list(iter_ifc_properties(path, columns, property_names, property_sets, properties, entity_types, lazy=lazy))
+    return rows, columns, property_names, property_sets
+
+
+def _extract_or_error(path, entity_types, properties, lazy):
+    try:
+        return extract(path, entity_types, properties, lazy)
+    except Exception as e:
+        return e
+
+
+def _outcome(result):
+    return f"raised {type(result).__name__}: {result}" if isinstance(result, Exception) else f"read {len(result[0])} rows"
+
+
+# Rows with each value's type, so 3 and 3.0 or True and 1 don't compare equal
+def _typed(rows):
+    return [sorted((name, type(value).__name__, value) for name, value in row.items()) for row in rows]
+
+
+def _first_difference(expected, actual):
+    for index, (expected_row, actual_row) in enumerate(zip(expected, actual)):
+        if expected_row != actual_row:
+            return f"row {index}: ifcopenshell {expected_row} != stepscan {actual_row}"
+    return f"{len(expected)} rows from ifcopenshell, {len(actual)} from stepscan"
+
+
+# Compare the readers on one model under every filter; returns a list of failure messages
+def check_model(path):
+    failures = []
+    for entity_types in ENTITY_FILTERS:
+        for properties in PROPERTY_FILTERS:
+            expected = _extract_or_error(path, entity_types, properties, lazy=False)
+            for read_chunk in READ_CHUNKS:
+                stepscan.READ_CHUNK = read_chunk
+                try:
+                    actual = _extract_or_error(path, entity_types, properties, lazy=True)
+                finally:
+                    stepscan.READ_CHUNK = READ_CHUNKS[0]
+                label = f"entity_types={sorted(entity_types or ())} properties={sorted(properties or ())} chunk={read_chunk}"
+                if isinstance(expected, Exception) or isinstance(actual, Exception):
+                    if not (isinstance(expected, Exception) and isinstance(actual, Exception)):
+                        failures.append(f"{label}: ifcopenshell {_outcome(expected)}, stepscan {_outcome(actual)}")
+                    continue
+                if _typed(expected[0]) != _typed(actual[0]):
+                    failures.append(f"{label}: {_first_difference(_typed(expected[0]), _typed(actual[0]))}")
+                for what, expected_set, actual_set in zip(("columns", "property names", "property sets"),
+                                                           expected[1:], actual[1:]):
+                    if expected_set != actual_set:
+                        failures.append(f"{label}: {what} differ: {sorted(expected_set ^ actual_set)}")
+    return failures
+
+
+# The scanner must raise ValueError on the model, whatever the filters and read chunk
+def check_refused(path):
+    failures = []
+    for read_chunk in READ_CHUNKS:
+        stepscan.READ_CHUNK = read_chunk
+        try:
+            extract(path, None, None, lazy=True)
+            failures.append(f"chunk={read_chunk}: stepscan read the model instead of raising ValueError")
+        except ValueError:
+            pass
+        finally:
+            stepscan.READ_CHUNK = READ_CHUNKS[0]
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the streaming STEP scanner with ifcopenshell on edge-case models.")
+    parser.add_argument("models", nargs="*", help="extra IFC models to compare as well")
+    parser.add_argument("--keep", metavar="DIR", help="write the generated models to DIR and keep them")
+    parser.add_argument("--synthetic-elements", type=int, default=200,
+                        help="elements in the generated benchmark-style model (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    case_dir = args.keep or tempfile.mkdtemp(prefix="stepscan-cases-")
+    os.makedirs(case_dir, exist_ok=True)
+    try:
+        checks = []
+        for name, text in edge_cases().items():
+            path = os.path.join(case_dir, f"{name}.ifc")
+            with open(path, "w", encoding="utf-8", newline="\n") as f:
+                f.write(text)
+            checks.append((name, path, check_model))
+        for name, text in refused_cases().items():
+            path = os.path.join(case_dir, f"{name}.ifc")
+            with open(path, "w", encoding="utf-8", newline="\n") as f:
+                f.write(text)
+            checks.append((name, path, check_refused))
+        synthetic_path = os.path.join(case_dir, "synthetic.ifc")
+        synthetic.write_ifc_model(synthetic_path, args.synthetic_elements)
+        checks.append(("synthetic", synthetic_path, check_model))
+        checks.extend((os.path.basename(path), path, check_model) for path in args.models)
+
+        failed = 0
+        for name, path, check in checks:
+            failures = check(path)
+            print(f"{'FAIL' if failures else 'ok  '}  {name}")
+            for failure in failures:
+                print(f"      {failure}")
+            failed += bool(failures)
+    finally:
+        if not args.keep:
+            shutil.rmtree(case_dir, ignore_errors=True)
+
+    print(f"{len(checks) - failed} of {len(checks)} models match")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
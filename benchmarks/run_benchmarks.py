@@ -0,0 +1,353 @@
+# (CC0) balaji.work
+# Benchmark harness: times the IFC export, validation and clash recolouring entry points on
+# synthetic inputs and appends the results to a JSON history, e.g.
+#   python benchmarks/run_benchmarks.py --scale small
+#   python benchmarks/run_benchmarks.py --scale medium --only replace_colors,write_cci_violations --repeat 5
+# Each benchmark runs in its own process with a private HOME (so the user's ifc2csv and
+# clashrecolour caches are neither used nor touched) and reports its own peak RSS.
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_DATA_DIR = os.path.join(BENCHMARK_DIR, ".data")
+DEFAULT_HISTORY = os.path.join(BENCHMARK_DIR, "history.json")
+
+# Input sizes per scale. IFC models have ifc_elements elements each, with property_sets sets of
+# properties_per_set values; clash images are image_size pixels, half PNG and half JPEG.
+SCALES = {
+    "small": {"ifc_files": 2, "ifc_elements": 2000, "property_sets": 4, "properties_per_set": 10,
+              "images": 20, "image_size": [640, 480], "workbook_images": 20, "cci_rows": 20000},
+    "medium": {"ifc_files": 4, "ifc_elements": 20000, "property_sets": 8, "properties_per_set": 10,
+               "images": 100, "image_size": [1280, 720], "workbook_images": 100, "cci_rows": 200000},
+    "large": {"ifc_files": 8, "ifc_elements": 100000, "property_sets": 12, "properties_per_set": 15,
+              "images": 400, "image_size": [1920, 1080], "workbook_images": 400, "cci_rows": 1000000},
+}
+
+# A benchmark slower than its previous run by more than this fraction is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+# Generate the inputs for a scale once; later runs reuse them while the generator version matches
+def prepare_inputs(data_dir, scale):
+    sys.path.insert(0, BENCHMARK_DIR)
+    import synthetic
+
+    params = SCALES[scale]
+    input_dir = os.path.join(data_dir, f"{scale}-g{synthetic.GENERATOR_VERSION}")
+    manifest_path = os.path.join(input_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    print(f"Generating {scale} inputs in {input_dir}")
+    shutil.rmtree(input_dir, ignore_errors=True)
+    ifc_dir = os.path.join(input_dir, "ifc")
+    os.makedirs(ifc_dir)
+    ifc_files = []
+    for index in range(params["ifc_files"]):
+        path = os.path.join(ifc_dir, f"model{index:02d}.ifc")
+        synthetic.write_ifc_model(path, params["ifc_elements"], params["property_sets"], params["properties_per_set"], seed=index)
+        ifc_files.append(path)
+
+    width, height = params["image_size"]
+    image_dir = os.path.join(input_dir, "images")
+    synthetic.write_clash_images(image_dir, params["images"], width, height)
+    workbook_images = synthetic.write_clash_images(os.path.join(input_dir, "workbook_images"), params["workbook_images"],
+                                                   width, height, seed=10000)
+    clash_workbook = os.path.join(input_dir, "clash_report.xlsx")
+    synthetic.write_clash_workbook(clash_workbook, workbook_images)
+    cci_workbook = os.path.join(input_dir, "cci_export.xlsx")
+    synthetic.write_cci_workbook(cci_workbook, params["cci_rows"])
+
+    manifest = dict(params, scale=scale, generator_version=synthetic.GENERATOR_VERSION, ifc_dir=ifc_dir,
+                    ifc_file_list=ifc_files, image_dir=image_dir, clash_workbook=clash_workbook, cci_workbook=cci_workbook)
+    # Written last, so an interrupted generation is redone rather than half-used
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# Each benchmark takes (inputs, work_dir) and returns (prepare, run, units, unit): prepare (or
+# None) runs untimed before every run, and units / seconds is reported as the throughput.
+
+def bench_extract_ifc_properties(inputs, work_dir):
+    from ifc2csv import extract_ifc_properties
+
+    path = inputs["ifc_file_list"][0]
+    return None, lambda: extract_ifc_properties(path), inputs["ifc_elements"], "elements"
+
+
+def _process_ifc_directory(inputs, work_dir, use_cache, selected=()):
+    import ifc2csv
+
+    output_dir = os.path.join(work_dir, "export")
+
+    def prepare():
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    def run():
+        ifc2csv.process_ifc_directory(inputs["ifc_dir"], output_dir, use_cache=use_cache, properties=selected)
+
+    return prepare, run, inputs["ifc_files"] * inputs["ifc_elements"], "elements"
+
+
+def bench_process_ifc_directory(inputs, work_dir):
+    return _process_ifc_directory(inputs, work_dir, use_cache=False)
+
+
+def bench_process_ifc_directory_cached(inputs, work_dir):
+    # The warm-up run fills the cache, so the timed runs measure merging cached rows and writing
+    return _process_ifc_directory(inputs, work_dir, use_cache=True)
+
+
+def bench_process_ifc_directory_selected(inputs, work_dir):
+    with open(os.path.join(REPO_DIR, "PSet.txt"), "r") as f:
+        selected = [line.strip() for line in f if line.strip()]
+    return _process_ifc_directory(inputs, work_dir, use_cache=False, selected=selected)
+
+
+# validate_excel re-validates a saved workbook; exports validate while writing (below)
+def bench_validate_excel(inputs, work_dir):
+    from ifc2csv import validate_excel
+
+    # validate_excel saves in place, so every run gets a fresh copy
+    workbook = os.path.join(work_dir, "cci_export.xlsx")
+    return (lambda: shutil.copyfile(inputs["cci_workbook"], workbook),
+            lambda: validate_excel(workbook), inputs["cci_rows"], "rows")
+
+
+# The CCI validation an export runs: rows come from a RowSpool, as in process_ifc_directory
+def _cci_export_rows(inputs):
+    import synthetic
+    from rowspool import RowSpool
+
+    rows = RowSpool()
+    rows.extend(synthetic.cci_rows(inputs["cci_rows"]))
+    return rows
+
+
+def bench_write_cci_violations(inputs, work_dir):
+    from ccivalidation import write_cci_violations
+
+    rows = _cci_export_rows(inputs)
+    violations_file = os.path.join(work_dir, "violations.csv")
+    return None, lambda: write_cci_violations(rows, violations_file), inputs["cci_rows"], "rows"
+
+
+def bench_write_validation_workbook(inputs, work_dir):
+    import synthetic
+    from ifc2csv import write_validation_workbook
+
+    rows = _cci_export_rows(inputs)
+    workbook, violations_file = os.path.join(work_dir, "validation.xlsx"), os.path.join(work_dir, "violations.csv")
+    return (None, lambda: write_validation_workbook(rows, synthetic.CCI_EXPORT_COLUMNS, workbook, violations_file),
+            inputs["cci_rows"], "rows")
+
+
+def bench_replace_colors(inputs, work_dir):
+    from colourizeclashimages import replace_colors
+
+    output_dir = os.path.join(work_dir, "recoloured")
+    return (lambda: shutil.rmtree(output_dir, ignore_errors=True),
+            lambda: replace_colors(inputs["image_dir"], output_dir, use_cache=False), inputs["images"], "images")
+
+
+def bench_replace_images_in_excel(inputs, work_dir):
+    from excelclashimagesrecoloured import extract_images_from_excel, replace_colors, replace_images_in_excel
+
+    extracted_dir = os.path.join(work_dir, "extracted")
+    recoloured_dir = os.path.join(work_dir, "recoloured")
+    extract_images_from_excel(inputs["clash_workbook"], extracted_dir)
+    replace_colors(extracted_dir, recoloured_dir, use_cache=False)
+    output_path = os.path.join(work_dir, "clash_report_recoloured.xlsx")
+    return (None, lambda: replace_images_in_excel(inputs["clash_workbook"], recoloured_dir, output_path),
+            inputs["workbook_images"], "images")
+
+
+BENCHMARKS = {
+    "extract_ifc_properties": bench_extract_ifc_properties,
+    "process_ifc_directory": bench_process_ifc_directory,
+    "process_ifc_directory_cached": bench_process_ifc_directory_cached,
+    "process_ifc_directory_selected": bench_process_ifc_directory_selected,
+    "validate_excel": bench_validate_excel,
+    "write_cci_violations": bench_write_cci_violations,
+    "write_validation_workbook": bench_write_validation_workbook,
+    "replace_colors": bench_replace_colors,
+    "replace_images_in_excel": bench_replace_images_in_excel,
+}
+
+
+# Peak resident memory in MB of this process and of its largest child (worker pools), where known
+def peak_rss_mb():
+    from instrumentation import peak_rss_mb as peak_self_rss_mb
+
+    peak_child = None
+    if resource is not None:
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+        peak_child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return peak_self_rss_mb(), peak_child
+
+
+# Runs inside the child process: one warm-up, then `repeat` timed runs
+def run_child(name, inputs, work_dir, repeat):
+    sys.path[:0] = [os.path.join(REPO_DIR, "ifc2csv"), REPO_DIR]
+    prepare, run, units, unit = BENCHMARKS[name](inputs, work_dir)
+    times = []
+    for attempt in range(repeat + 1):
+        if prepare:
+            prepare()
+        start = time.perf_counter()
+        run()
+        if attempt:
+            times.append(time.perf_counter() - start)
+    peak_self, peak_child = peak_rss_mb()
+    median = statistics.median(times)
+    return {"seconds": median, "runs": times, "units": units, "unit": unit, "throughput": units / median,
+            "peak_rss_mb": peak_self, "peak_child_rss_mb": peak_child}
+
+
+def run_benchmark(name, inputs, repeat, verbose=False):
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as work_dir:
+        home = os.path.join(work_dir, "home")
+        os.makedirs(home)
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        inputs_path = os.path.join(work_dir, "inputs.json")
+        result_path = os.path.join(work_dir, "result.json")
+        with open(inputs_path, "w", encoding="utf-8") as f:
+            json.dump(inputs, f)
+        command = [sys.executable, os.path.abspath(__file__), "--child", name, "--inputs", inputs_path,
+                   "--result", result_path, "--repeat", str(repeat)]
+        completed = subprocess.run(command, env=env, cwd=work_dir,
+                                   stdout=None if verbose else subprocess.DEVNULL,
+                                   stderr=None if verbose else subprocess.PIPE, text=True)
+        if completed.returncode != 0 or not os.path.exists(result_path):
+            return {"error": (completed.stderr or "").strip().splitlines()[-1:] or [f"exit code {completed.returncode}"]}
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision + ("-dirty" if dirty else "")
+
+
+def load_history(history_path):
+    try:
+        with open(history_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+# Latest successful result of each benchmark at a scale: {name: (history entry, result)}
+def previous_results(history, scale):
+    previous = {}
+    for entry in history:
+        if entry["scale"] == scale:
+            previous.update((name, (entry, result)) for name, result in entry["results"].items() if "error" not in result)
+    return previous
+
+
+# Print this run's results next to each benchmark's last recorded run; returns the regressed names
+def report(record, previous):
+    regressions = []
+    print(f"\n{'benchmark':<32}{'median s':>10}{'throughput':>22}{'peak RSS MB':>13}{'vs last':>10}")
+    for name, result in record["results"].items():
+        if "error" in result:
+            print(f"{name:<32}  failed: {' '.join(result['error'])}")
+            continue
+        change = ""
+        if name in previous:
+            before = previous[name][1]
+            ratio = result["seconds"] / before["seconds"] - 1
+            change = f"{ratio:+.1%}"
+            if ratio > REGRESSION_THRESHOLD:
+                regressions.append(name)
+                change += " !"
+        peak = "" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f}"
+        throughput = f"{result['throughput']:,.0f} {result['unit']}/s"
+        print(f"{name:<32}{result['seconds']:>10.3f}{throughput:>22}{peak:>13}{change:>10}")
+    if previous:
+        compared = sorted({f"{entry['revision'] or 'unknown revision'} at {entry['timestamp']}" for entry, _ in previous.values()})
+        print(f"\nCompared with {'; '.join(compared)}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ifc2csv and the clash recolouring scripts on synthetic inputs.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", help=f"comma-separated benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, after one warm-up (default: 3)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated inputs are kept between runs")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON file the results are appended to")
+    parser.add_argument("--no-history", action="store_true", help="print the results without recording them")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help=f"exit with 1 when a benchmark is over {REGRESSION_THRESHOLD:.0%} slower than last time")
+    parser.add_argument("--verbose", action="store_true", help="show the benchmarked functions' own output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--inputs", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        with open(args.inputs, "r", encoding="utf-8") as f:
+            inputs = json.load(f)
+        result = run_child(args.child, inputs, os.getcwd(), args.repeat)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    names = [name.strip() for name in (args.only or ",".join(BENCHMARKS)).split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    inputs = prepare_inputs(args.data_dir, args.scale)
+    record = {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "revision": git_revision(),
+              "scale": args.scale, "inputs": SCALES[args.scale], "repeat": args.repeat,
+              "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+              "results": {}}
+    for name in names:
+        print(f"Running {name} ...", flush=True)
+        record["results"][name] = run_benchmark(name, inputs, args.repeat, args.verbose)
+
+    history = load_history(args.history)
+    regressions = report(record, previous_results(history, args.scale))
+    if not args.no_history:
+        history.append(record)
+        with open(args.history, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2)
+        print(f"Appended results to {args.history}")
+    if regressions:
+        print(f"Slower than last run: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# (CC0) balaji.work
+# Deterministic synthetic inputs for the benchmarks: IFC models, clash images and clash report workbooks
+import os
+import random
+
+import numpy as np
+from PIL import Image
+
+# Bump whenever a generator's output changes, so cached inputs are regenerated
+GENERATOR_VERSION = 1
+
+_GUID_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_$"
+
+_ELEMENT_CLASSES = ("IfcWall", "IfcBeam", "IfcColumn", "IfcSlab")
+
+# Every this-many elements one CCI multi-level ID is wrong, so validation has something to flag
+VIOLATION_EVERY = 50
+
+
+def _ifc_guid(rng):
+    number = rng.getrandbits(128)
+    return "".join(_GUID_ALPHABET[(number >> (6 * i)) & 63] for i in reversed(range(22)))
+
+
+# STEP string literal, with quotes doubled and non-ASCII characters in \X2\ form
+def _step_string(text):
+    out = []
+    for char in text:
+        if char == "'":
+            out.append("''")
+        elif char == "\\":
+            out.append("\\\\")
+        elif ord(char) < 128:
+            out.append(char)
+        else:
+            out.append("\\X2\\%04X\\X0\\" % ord(char))
+    return "'" + "".join(out) + "'"
+
+
+def _step_value(value):
+    if isinstance(value, bool):
+        return f"IFCBOOLEAN(.{'T' if value else 'F'}.)"
+    if isinstance(value, int):
+        return f"IFCINTEGER({value})"
+    if isinstance(value, float):
+        return f"IFCREAL({value!r})"
+    return f"IFCLABEL({_step_string(value)})"
+
+
+# Write an IFC4 model with `elements` building elements. Each element has its own CCI property
+# set (mostly valid multi-level IDs) plus property_sets - 1 more sets of properties_per_set
+# values; every other extra set is shared by all elements, like a type's properties.
+def write_ifc_model(path, elements, property_sets=4, properties_per_set=10, seed=0):
+    rng = random.Random(seed)
+    next_id = iter(range(1, 1 << 62))
+    lines = []
+
+    def add(entity):
+        entity_id = next(next_id)
+        lines.append(f"#{entity_id}={entity};")
+        return entity_id
+
+    def add_property_set(name, values):
+        property_ids = [add(f"IFCPROPERTYSINGLEVALUE({_step_string(key)},$,{_step_value(value)},$)")
+                        for key, value in values.items()]
+        return add(f"IFCPROPERTYSET('{_ifc_guid(rng)}',$,{_step_string(name)},$,({','.join(f'#{i}' for i in property_ids)}))")
+
+    def relate(object_ids, property_set_id):
+        add(f"IFCRELDEFINESBYPROPERTIES('{_ifc_guid(rng)}',$,$,$,({','.join(f'#{i}' for i in object_ids)}),#{property_set_id})")
+
+    add(f"IFCPROJECT('{_ifc_guid(rng)}',$,'Synthetic',$,$,$,$,$,$)")
+    element_ids = []
+    for index in range(elements):
+        ifc_class = _ELEMENT_CLASSES[index % len(_ELEMENT_CLASSES)]
+        name = "$" if index % 7 == 0 else _step_string(f"Element {index}")
+        element_id = add(f"{ifc_class.upper()}('{_ifc_guid(rng)}',$,{name},$,$,$,$,$,$)")
+        element_ids.append(element_id)
+
+        type_id, location_id = f"T{index % 12}", str(index % 400)
+        multi_type = f"§L{index % 3}.{type_id}"
+        multi_location = f"+B{index % 5}.A{index % 9}.{location_id}"
+        if index % VIOLATION_EVERY == 0:
+            multi_location = "wrong"
+        relate([element_id], add_property_set("CCI", {
+            "CCILevel1ParentTypeID": type_id, "CCILevel2ParentTypeID": f"L{index % 3}", "CCIMultiLevelTypeID": multi_type,
+            "CCILevel1ParentLocationID": f"A{index % 9}", "CCILevel2ParentLocationID": f"B{index % 5}",
+            "CCILocationID": location_id, "CCIMultiLevelLocationID": multi_location,
+        }))
+        for set_index in range(1, property_sets):
+            if set_index % 2 == 0:
+                continue  # shared sets are related once, below
+            relate([element_id], add_property_set(f"Pset_Instance{set_index}", {
+                f"Instance{set_index}_{i}": (index * i if i % 3 == 0 else index * 0.25 + i if i % 3 == 1 else f"V{index % 97}-{i}")
+                for i in range(properties_per_set)
+            }))
+    for set_index in range(2, property_sets, 2):
+        relate(element_ids, add_property_set(f"Pset_Shared{set_index}", {
+            f"Shared{set_index}_{i}": (i % 2 == 0 if i % 4 == 0 else f"Shared value {i}") for i in range(properties_per_set)
+        }))
+
+    header = ("ISO-10303-21;\nHEADER;\nFILE_DESCRIPTION(('ViewDefinition [ReferenceView]'),'2;1');\n"
+              f"FILE_NAME('{os.path.basename(path)}','2000-01-01T00:00:00',(''),(''),'synthetic','synthetic','');\n"
+              "FILE_SCHEMA(('IFC4'));\nENDSEC;\nDATA;\n")
+    with open(path, "w", encoding="ascii") as f:
+        f.write(header)
+        f.write("\n".join(lines))
+        f.write("\nENDSEC;\nEND-ISO-10303-21;\n")
+    return elements
+
+
+# A Navisworks-style clash image: grey shaded background with red and green clashing objects
+def make_clash_image(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    shade = np.linspace(170, 230, width, dtype=np.float32)[None, :] + np.linspace(0, 20, height, dtype=np.float32)[:, None]
+    rgb = np.repeat(shade[:, :, None], 3, axis=2)
+    for colour in ((220, 30, 30), (40, 200, 40)):
+        for _ in range(6):
+            x0, y0 = rng.integers(0, width * 3 // 4), rng.integers(0, height * 3 // 4)
+            x1, y1 = x0 + rng.integers(width // 10, width // 4), y0 + rng.integers(height // 10, height // 4)
+            # Lit faces, so the colours vary like a rendered model rather than flat fills
+            light = rng.uniform(0.6, 1.0)
+            rgb[y0:y1, x0:x1] = np.array(colour, dtype=np.float32) * light
+    rgb += rng.normal(0, 2.0, rgb.shape).astype(np.float32)
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB")
+
+
+# Write count clash images of width x height into folder, alternating PNG and JPEG
+def write_clash_images(folder, count, width, height, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for index in range(count):
+        img = make_clash_image(width, height, seed + index)
+        if index % 2 == 0:
+            path = os.path.join(folder, f"clash{index:05d}.png")
+            img.save(path, "PNG")
+        else:
+            path = os.path.join(folder, f"clash{index:05d}.jpg")
+            img.save(path, "JPEG", quality=90)
+        paths.append(path)
+    return paths
+
+
+# Write a clash report workbook with one row and one embedded image per clash
+def write_clash_workbook(path, image_paths):
+    from openpyxl import Workbook
+    from openpyxl.drawing.image import Image as SheetImage
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Clash", "Status", "Distance", "Image"])
+    for index, image_path in enumerate(image_paths):
+        ws.append([f"Clash{index + 1}", "New", -0.01 * (index % 40), None])
+        picture = SheetImage(image_path)
+        picture.width, picture.height = 160, 120
+        ws.add_image(picture, f"D{index + 2}")
+    wb.save(path)
+    return len(image_paths)
+
+
+# Columns of an export with the CCI properties, as write_cci_workbook and cci_rows lay them out
+CCI_EXPORT_COLUMNS = ["GlobalId", "Name", "Type", "CCILevel1ParentLocationID", "CCILevel1ParentTypeID",
+                      "CCILevel2ParentLocationID", "CCILevel2ParentTypeID", "CCILocationID",
+                      "CCIMultiLevelLocationID", "CCIMultiLevelTypeID"]
+
+
+# Yield `rows` export-shaped element row dicts with the CCI columns, mostly valid multi-level IDs
+def cci_rows(rows, seed=0):
+    rng = random.Random(seed)
+    for index in range(rows):
+        location = f"+B{index % 5}.A{index % 9}.{index % 400}" if index % VIOLATION_EVERY else "wrong"
+        yield dict(zip(CCI_EXPORT_COLUMNS, [
+            _ifc_guid(rng), f"Element {index}", _ELEMENT_CLASSES[index % len(_ELEMENT_CLASSES)],
+            f"A{index % 9}", f"T{index % 12}", f"B{index % 5}", f"L{index % 3}", index % 400,
+            location, f"§L{index % 3}.T{index % 12}"]))
+
+
+# Write an export-shaped workbook (GlobalId, Name, Type and the CCI columns) for validate_excel
+def write_cci_workbook(path, rows, seed=0):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Combined Output")
+    ws.append(CCI_EXPORT_COLUMNS)
+    for row in cci_rows(rows, seed):
+        ws.append([row[column] for column in CCI_EXPORT_COLUMNS])
+    wb.save(path)
+    return rows
@@ -0,0 +1,429 @@
+import copy
+import hashlib
+import io
+import os
+import struct
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, JpegImagePlugin
+
+# Golden yellow keeps the red intensity and scales green by this factor
+GOLDEN_YELLOW_GREEN_RATIO = 0.874
+
+# Bump whenever recolour_array changes so cached lookup tables are rebuilt
+RULES_VERSION = 1
+
+# Bump whenever recoloured images are encoded differently so cached results are redone
+ENCODING_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".clashrecolour")
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Image modes without colour channels, which the rules never change
+GREYSCALE_MODES = ("1", "L", "LA", "La", "I", "I;16", "F")
+
+# PNG compress_level for each zlib FLEVEL (fastest, fast, default, maximum) found in the source,
+# so a recoloured image is compressed as hard as the original was
+PNG_COMPRESS_LEVELS = (1, 3, 6, 9)
+
+# Lookup table mapped and result cache opened once per worker process
+_worker_lut = None
+_worker_cache = None
+
+
+def recolour_array(rgb):
+    """Apply the clash recolour rules in place to an (..., 3) uint8 RGB array."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+    # First pass: Change green shades to shades of blue
+    green = (g > r) & (g > b)
+    b[green] = g[green]
+    r[green] = 0
+    g[green] = 0
+
+    # Second pass: Change red shades to shades of golden yellow.
+    # The mask is taken after the first pass, exactly like the original pixel loops.
+    red = (r > g) & (r > b)
+    g[red] = (r[red].astype(np.float64) * GOLDEN_YELLOW_GREEN_RATIO).astype(np.uint8)
+    b[red] = 0
+    return rgb
+
+
+def build_colour_lut():
+    """Return a (2**24, 3) uint8 table holding the recoloured value of every packed 0xRRGGBB colour."""
+    packed = np.arange(1 << 24, dtype=np.uint32)
+    lut = np.empty((1 << 24, 3), dtype=np.uint8)
+    lut[:, 0] = packed >> 16
+    lut[:, 1] = (packed >> 8) & 0xFF
+    lut[:, 2] = packed & 0xFF
+    return recolour_array(lut)
+
+
+def load_colour_lut(cache_dir=DEFAULT_CACHE_DIR):
+    """Load the colour lookup table memory-mapped from cache_dir, building and caching it on first use."""
+    lut_path = os.path.join(cache_dir, f"colour_lut_v{RULES_VERSION}.npy")
+    if not os.path.exists(lut_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a private file first so concurrent runs never map a half-written table
+        temp_path = f"{lut_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.save(f, build_colour_lut())
+        os.replace(temp_path, lut_path)
+        print(f"Built colour lookup table: {lut_path}")
+    return np.load(lut_path, mmap_mode="r")
+
+
+def recolour_array_lut(rgb, lut):
+    """Return a recoloured copy of an (..., 3) uint8 RGB array using a table from load_colour_lut."""
+    packed = rgb[..., 0].astype(np.uint32) << 16
+    packed |= rgb[..., 1].astype(np.uint32) << 8
+    packed |= rgb[..., 2]
+    return lut[packed]
+
+
+def needs_recolour(rgb):
+    """Return True if any colour of an (..., 3) uint8 RGB array is green- or red-dominant."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    return bool(np.any((g > r) & (g > b)) or np.any((r > g) & (r > b)))
+
+
+def recolour_image_keep_mode(img, lut=None):
+    """Recolour a PIL image without changing its mode, or return None if the rules change nothing.
+
+    Greyscale images are not decoded at all, palette images have only their palette recoloured
+    and RGBA images keep their alpha; any other mode is recoloured as an RGB copy.
+    """
+    if img.mode in GREYSCALE_MODES:
+        return None
+    if img.mode == "P":
+        palette = np.array(img.getpalette(), dtype=np.uint8).reshape(-1, 3)
+        if not needs_recolour(palette):
+            return None
+        recoloured = img.copy()
+        recoloured.putpalette(_recolour_pixels(palette.copy(), lut).tobytes())
+        return recoloured
+    if img.mode == "RGBA":
+        rgba = np.array(img, dtype=np.uint8)
+        if not needs_recolour(rgba[..., :3]):
+            return None
+        rgba[..., :3] = _recolour_pixels(np.ascontiguousarray(rgba[..., :3]), lut)
+        return Image.fromarray(rgba, "RGBA")
+    rgb = np.array(img.convert("RGB"), dtype=np.uint8)
+    if not needs_recolour(rgb):
+        return None
+    return Image.fromarray(_recolour_pixels(rgb, lut), "RGB")
+
+
+def _recolour_pixels(rgb, lut):
+    # rgb is a private copy, so the in-place rules may overwrite it
+    return recolour_array_lut(rgb, lut) if lut is not None else recolour_array(rgb)
+
+
+def _png_compress_level(data):
+    """Return the PNG_COMPRESS_LEVELS entry for the zlib header of a PNG's first IDAT chunk."""
+    pos = 8
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        if chunk_type == b"IDAT" and length >= 2:
+            return PNG_COMPRESS_LEVELS[data[pos + 9] >> 6]
+        pos += 12 + length
+    return PNG_COMPRESS_LEVELS[2]
+
+
+def _exact_palette_image(img):
+    """Return an RGB image with at most 256 colours as a lossless palette image, or None."""
+    colours = img.getcolors(256)
+    if colours is None:
+        return None
+    palette = np.array(sorted(colour for _, colour in colours), dtype=np.uint8)
+    packed_palette = (palette[:, 0].astype(np.uint32) << 16) | (palette[:, 1].astype(np.uint32) << 8) | palette[:, 2]
+    rgb = np.asarray(img)
+    packed = (rgb[..., 0].astype(np.uint32) << 16) | (rgb[..., 1].astype(np.uint32) << 8) | rgb[..., 2]
+    indexed = Image.fromarray(np.searchsorted(packed_palette, packed).astype(np.uint8), "P")
+    indexed.putpalette(palette.tobytes())
+    return indexed
+
+
+def encode_like(source, data, recoloured):
+    """Encode a recoloured image in the format of the source image (opened from data), tuned to it.
+
+    PNGs are compressed at the source's level, as palette images when they have at most 256
+    colours. JPEGs reuse the source's quantization tables and chroma subsampling, so they keep
+    its quality, with optimized Huffman tables.
+    """
+    output = io.BytesIO()
+    if source.format == "PNG":
+        options = {"compress_level": _png_compress_level(data)}
+        if recoloured.mode == "RGB":
+            recoloured = _exact_palette_image(recoloured) or recoloured
+        if recoloured.mode == "P":
+            options["optimize"] = True
+            if "transparency" in source.info and source.mode == "P":
+                options["transparency"] = source.info["transparency"]
+        for key in ("dpi", "icc_profile"):
+            if key in source.info:
+                options[key] = source.info[key]
+        recoloured.save(output, "PNG", **options)
+    elif source.format == "JPEG" and source.mode == recoloured.mode:
+        options = {"qtables": source.quantization, "optimize": True,
+                   "progressive": bool(source.info.get("progressive") or source.info.get("progression"))}
+        subsampling = JpegImagePlugin.get_sampling(source)
+        if subsampling != -1:
+            options["subsampling"] = subsampling
+        for key in ("dpi", "icc_profile"):
+            if key in source.info:
+                options[key] = source.info[key]
+        recoloured.save(output, "JPEG", **options)
+    else:
+        recoloured.save(output, source.format)
+    return output.getvalue()
+
+
+class RecolourCache:
+    """Persistent LRU store of recoloured image bytes keyed by a hash of the source bytes and RULES_VERSION.
+
+    Entries live as files under cache_dir; reading an entry refreshes its mtime, and the
+    least recently used entries are deleted once the total size passes max_bytes.
+    """
+
+    def __init__(self, cache_dir=os.path.join(DEFAULT_CACHE_DIR, "images"), max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Removed by another process sharing the cache
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _path(self, data):
+        digest = hashlib.sha256(f"rules-v{RULES_VERSION}-encoding-v{ENCODING_VERSION}:".encode() + data).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def get(self, data):
+        """Return the cached recoloured bytes for the source image bytes, or None."""
+        path = self._path(data)
+        try:
+            with open(path, "rb") as f:
+                recoloured = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return recoloured
+
+    def put(self, data, recoloured):
+        """Store the recoloured bytes for the source image bytes and evict old entries if over the cap."""
+        path = self._path(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(recoloured)
+        os.replace(temp_path, path)
+        self._size += len(recoloured)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self._size = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+
+def recolour_bytes(data, lut=None, cache=None):
+    """Recolour an encoded image and return it re-encoded in its original format.
+
+    An image the rules leave unchanged is returned as the very same bytes object, so callers can
+    tell with `is` and keep the original. With a RecolourCache, images already recoloured under
+    the current rules are returned from it; unchanged images are cached as an empty entry.
+    """
+    if cache is not None:
+        recoloured = cache.get(data)
+        if recoloured is not None:
+            return recoloured or data
+
+    img = Image.open(io.BytesIO(data))
+    recoloured_img = recolour_image_keep_mode(img, lut)
+    recoloured = data if recoloured_img is None else encode_like(img, data, recoloured_img)
+
+    if cache is not None:
+        cache.put(data, b"" if recoloured is data else recoloured)
+    return recoloured
+
+
+def _recolour_job(job):
+    """Recolour one file inside a worker; returns (output_path, bytes_read, error)."""
+    global _worker_lut, _worker_cache
+    input_path, output_path, use_lut, use_cache = job
+    try:
+        if use_lut and _worker_lut is None:
+            _worker_lut = load_colour_lut()
+        if use_cache and _worker_cache is None:
+            _worker_cache = RecolourCache()
+        with open(input_path, "rb") as f:
+            data = f.read()
+        recoloured = recolour_bytes(data, _worker_lut if use_lut else None, _worker_cache if use_cache else None)
+        with open(output_path, "wb") as f:
+            f.write(recoloured)
+        return output_path, len(data), None
+    except Exception as e:
+        return output_path, 0, str(e)
+
+
+def recolour_folder(input_folder, output_folder, workers=None, chunksize=4, use_lut=False, use_cache=False):
+    """Recolour every image in input_folder across a process pool and return {output_path: error} for failures.
+
+    workers=None uses one process per core; workers=1 runs in the calling process.
+    use_cache shares a RecolourCache between runs so unchanged images are not recoloured again.
+    """
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    filenames = [f for f in os.listdir(input_folder) if f.endswith(IMAGE_EXTENSIONS)]
+    jobs = [(os.path.join(input_folder, f), os.path.join(output_folder, f), use_lut, use_cache) for f in filenames]
+    if use_lut:
+        # Build the table here so the workers only ever map the cached file
+        load_colour_lut()
+
+    errors = {}
+    processed = 0
+    bytes_read = 0
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        results = pool.map(_recolour_job, jobs, chunksize=chunksize) if pool else map(_recolour_job, jobs)
+        for output_path, size, error in results:
+            if error:
+                errors[output_path] = error
+                print(f"Failed: {output_path}: {error}")
+            else:
+                processed += 1
+                bytes_read += size
+                print(f"Processed and saved: {output_path}")
+    finally:
+        if pool:
+            pool.shutdown()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"Recoloured {processed} images in {elapsed:.2f}s "
+          f"({processed / elapsed:.1f} images/s, {bytes_read / 1e6 / elapsed:.1f} MB/s), {len(errors)} failed")
+    return errors
+
+
+def _strip_zip64_extra(extra):
+    """Drop the ZIP64 field from a member's extra data; FileHeader re-adds it when needed."""
+    kept = b""
+    while len(extra) >= 4:
+        field_id, size = struct.unpack("<HH", extra[:4])
+        if field_id != 1:
+            kept += extra[:4 + size]
+        extra = extra[4 + size:]
+    return kept
+
+
+def _copy_zip_member_raw(zin, zout, info):
+    """Append a member's still-compressed bytes from zin to zout without inflating or deflating them."""
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    out_info = copy.copy(info)
+    out_info.extra = _strip_zip64_extra(info.extra)
+    # CRC and sizes are known up front, so they go in the local header instead of a data descriptor
+    out_info.flag_bits &= ~0x08
+    out_info.header_offset = zout.fp.tell()
+    zout.fp.write(out_info.FileHeader())
+
+    remaining = info.compress_size
+    while remaining:
+        chunk = zin.fp.read(min(remaining, 1 << 20))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member: {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(out_info)
+    zout.NameToInfo[out_info.filename] = out_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+
+def is_workbook_image(member_name):
+    """Return True for workbook members that hold recolourable media images."""
+    return member_name.startswith("xl/media/") and member_name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def rewrite_workbook_media(input_excel_path, output_excel_path, replace_media):
+    """Stream a workbook into output_excel_path, passing each media image through replace_media.
+
+    replace_media(member_name, data) returns the new image bytes, or None to keep the original.
+    Every other member is copied across still compressed. The output is written to a
+    sibling temporary file and moved into place only once it is complete.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_excel_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".xlsx.part", dir=output_dir)
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(input_excel_path, 'r') as zin, zipfile.ZipFile(temp_path, 'w') as zout:
+            for info in zin.infolist():
+                new_data = None
+                if is_workbook_image(info.filename):
+                    new_data = replace_media(info.filename, zin.read(info))
+                if new_data is None:
+                    _copy_zip_member_raw(zin, zout, info)
+                else:
+                    out_info = copy.copy(info)
+                    out_info.extra = _strip_zip64_extra(info.extra)
+                    zout.writestr(out_info, new_data, compress_type=info.compress_type)
+        os.replace(temp_path, output_excel_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def recolour_excel(input_excel_path, output_excel_path, use_lut=False, cache=None):
+    """Recolour every image embedded in a workbook in a single streaming pass.
+
+    With a RecolourCache, images repeated within the workbook or seen in earlier runs are recoloured once.
+    """
+    lut = load_colour_lut() if use_lut else None
+    recoloured = 0
+    unchanged = 0
+
+    def replace_media(member_name, data):
+        nonlocal recoloured, unchanged
+        new_data = recolour_bytes(data, lut, cache)
+        if new_data is data:
+            # Nothing to recolour: the member is copied across still compressed
+            unchanged += 1
+            return None
+        recoloured += 1
+        print(f"Recoloured: {member_name}")
+        return new_data
+
+    rewrite_workbook_media(input_excel_path, output_excel_path, replace_media)
+    cache_note = f" ({cache.hits} from cache)" if cache is not None else ""
+    print(f"Recoloured {recoloured} images{cache_note}, {unchanged} unchanged, saved as: {output_excel_path}")
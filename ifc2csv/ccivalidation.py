@@ -0,0 +1,99 @@
+# (CC0) balaji.work
+# CCI multi-level ID checks, evaluated column-wise over extracted element rows
+import math
+from itertools import islice
+
+import pandas as pd
+
+# Columns the CCI checks read; validation is skipped unless all of them are exported
+CCI_REQUIRED_COLUMNS = [
+    "CCILevel1ParentLocationID", "CCILevel1ParentTypeID",
+    "CCILevel2ParentLocationID", "CCILevel2ParentTypeID",
+    "CCILocationID", "CCIMultiLevelLocationID", "CCIMultiLevelTypeID"
+]
+
+VIOLATION_FIELDS = ["GlobalId", "column", "expected", "actual"]
+
+# Rows evaluated per vectorized batch; bounds memory on very large projects
+BATCH_SIZE = 50000
+
+try:
+    import pyarrow  # noqa: F401
+    # Arrow-backed strings run the concatenations and comparisons in native code
+    _STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    _STRING_DTYPE = object
+
+
+# Return {column: expected text} for the CCI multi-level IDs, given the text of the CCI cells.
+# Works on a single row of strings or on whole pandas columns at once.
+def expected_cci_values(row_text):
+    return {
+        "CCIMultiLevelTypeID": "§" + row_text["CCILevel2ParentTypeID"] + "." + row_text["CCILevel1ParentTypeID"],
+        "CCIMultiLevelLocationID": "+" + row_text["CCILevel2ParentLocationID"] + "." + row_text["CCILevel1ParentLocationID"] + "." + row_text["CCILocationID"],
+    }
+
+
+# Text of a value as validate_excel sees it once written: openpyxl stores numbers as "%.16g"
+# and reads them back as int or float, and empty cells come back as None
+def excel_text(value):
+    if value is None or (isinstance(value, str) and value == ""):
+        return "None"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if math.isnan(value) or math.isinf(value):
+            return "None"
+        number = "%.16g" % value
+        return str(float(number) if ("." in number or "e" in number or "E" in number) else int(number))
+    return str(value)
+
+
+def _text_column(values):
+    series = pd.Series(values, dtype=object)
+    if pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty"):
+        # Plain labels, the usual case: only blanks need mapping
+        text = series.astype(_STRING_DTYPE).fillna("None")
+        text = text.where(text != "", "None")
+    else:
+        text = series.map(excel_text).astype(_STRING_DTYPE)
+    # Match the '= escaping applied to exported values
+    return text.where(~text.str.startswith("="), "'" + text)
+
+
+# Split any iterable of rows into lists of at most batch_size rows
+def iter_batches(rows, batch_size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+# Check a list of row dicts against the CCI rules. Returns a DataFrame with one row per failed
+# check (offset into rows, GlobalId, column, expected, actual), ordered by row, type check first.
+def check_cci_batch(rows):
+    text = {column: _text_column([row.get(column) for row in rows]) for column in CCI_REQUIRED_COLUMNS}
+    global_ids = pd.Series([row.get("GlobalId") for row in rows], dtype=object)
+    failed = []
+    for column, expected in expected_cci_values(text).items():
+        mask = (text[column] != expected).to_numpy(dtype=bool)
+        failed.append(pd.DataFrame({
+            "offset": mask.nonzero()[0], "GlobalId": global_ids[mask].to_numpy(), "column": column,
+            "expected": expected[mask].to_numpy(), "actual": text[column][mask].to_numpy(),
+        }))
+    # Stable sort keeps the type check ahead of the location check within a row
+    return pd.concat(failed, ignore_index=True).sort_values("offset", kind="stable", ignore_index=True)
+
+
+# Validate extracted rows without any workbook and write a violations CSV
+# (GlobalId, column, expected, actual). Returns the number of violations.
+def write_cci_violations(all_element_data, violations_file):
+    count = 0
+    with open(violations_file, mode="w", newline="", encoding="utf-8") as f:
+        f.write(",".join(VIOLATION_FIELDS) + "\n")
+        for batch in iter_batches(all_element_data):
+            violations = check_cci_batch(batch)
+            violations.to_csv(f, columns=VIOLATION_FIELDS, header=False, index=False, lineterminator="\n")
+            count += len(violations)
+    print(f"Saved {count} CCI violations to: {violations_file}")
+    return count
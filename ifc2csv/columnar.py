@@ -0,0 +1,107 @@
+# (CC0) balaji.work
+# Typed Parquet / Feather export of the combined element table
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Only the columnar outputs need pyarrow
+    pa = None
+
+from ccivalidation import iter_batches
+
+COLUMNAR_FORMATS = ("parquet", "feather")
+
+# Rows per Parquet row group / Feather record batch; only one batch is held in memory at a time
+ROW_GROUP_SIZE = 65536
+
+# String columns with at most this many distinct values are dictionary-encoded; IDs and other
+# high-cardinality columns are stored as plain strings
+MAX_DICTIONARY_SIZE = 1 << 16
+
+
+# Pick an Arrow type per column from the Python types of its values: numbers stay numeric
+# (int64, or float64 when ints and floats mix), booleans stay boolean, and anything else is
+# written as text the same way the CSV writes it
+def infer_schema(all_element_data, all_columns):
+    value_types = {column: set() for column in all_columns}
+    distinct_values = {column: set() for column in all_columns}
+    for row in all_element_data:
+        for column in all_columns:
+            value = row.get(column)
+            if value is None:
+                continue
+            value_types[column].add(type(value))
+            distinct = distinct_values[column]
+            if distinct is not None:
+                distinct.add(str(value))
+                if len(distinct) > MAX_DICTIONARY_SIZE:
+                    distinct_values[column] = None
+
+    fields = []
+    for column in all_columns:
+        types = value_types[column]
+        if types == {bool}:
+            arrow_type = pa.bool_()
+        elif types == {int}:
+            arrow_type = pa.int64()
+        elif types and types <= {int, float}:
+            arrow_type = pa.float64()
+        elif distinct_values[column] is not None:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+class _BatchEncoder:
+    """Turns lists of row dicts into record batches for a fixed schema.
+
+    Dictionary columns share one growing dictionary across batches, so every batch after the
+    first only adds new values (an IPC dictionary delta) instead of replacing the dictionary.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.dictionaries = {field.name: {} for field in schema if pa.types.is_dictionary(field.type)}
+
+    def encode(self, rows):
+        arrays = []
+        for field in self.schema:
+            values = [row.get(field.name) for row in rows]
+            if field.name in self.dictionaries:
+                positions = self.dictionaries[field.name]
+                indices = [None if value is None else positions.setdefault(str(value), len(positions)) for value in values]
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(positions), pa.string())))
+            elif field.type == pa.string():
+                arrays.append(pa.array([None if value is None else str(value) for value in values], pa.string()))
+            elif field.type == pa.float64():
+                arrays.append(pa.array([None if value is None else float(value) for value in values], pa.float64()))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.record_batch(arrays, schema=self.schema)
+
+
+# Write the selected columns of all_element_data as Parquet or Feather, streaming one row group
+# at a time. all_element_data must be re-iterable (a list or RowSpool): it is read once to infer
+# the column types and once to write. Values are written raw, without the CSV's '= escaping.
+def write_columnar(all_element_data, all_columns, output_path, file_format):
+    if pa is None:
+        raise RuntimeError(f"pyarrow is required for {file_format} output")
+    schema = infer_schema(all_element_data, all_columns)
+    encoder = _BatchEncoder(schema)
+
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(output_path, schema, compression="zstd")
+    else:
+        writer = ipc.new_file(output_path, schema,
+                              options=ipc.IpcWriteOptions(compression="lz4", emit_dictionary_deltas=True))
+    with writer:
+        for rows in iter_batches(all_element_data, ROW_GROUP_SIZE):
+            batch = encoder.encode(rows)
+            if file_format == "parquet":
+                writer.write_batch(batch, row_group_size=len(rows))
+            else:
+                writer.write_batch(batch)
+    print(f"Saved {file_format.capitalize()}: {output_path}")
+    return output_path
@@ -1,53 +1,92 @@
 # (CC0) balaji.work
 # Updated to have any paramters exported from IFC Models
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+    from propertypicker import PropertyPicker
+except ImportError:  # Headless servers may have Python without Tk; only the GUI needs it
+    tk = None
 import ifcopenshell
+import argparse
 import csv
+import hashlib
+import multiprocessing
 import os
+import queue
+import shutil
 import sys
-import pandas as pd
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import webbrowser
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from datetime import datetime  # For timestamp in Excel filename
 
+from ccivalidation import (CCI_REQUIRED_COLUMNS, VIOLATION_FIELDS, check_cci_batch, expected_cci_values, iter_batches,
+                           write_cci_violations)
+from columnar import COLUMNAR_FORMATS, write_columnar
+from ifccache import IfcFileCache
+from instrumentation import ExportCancelled, PipelineStats
+from rowspool import RowSpool, SpooledRows
+from stepscan import iter_step_properties
+
 # Log errors to a file when running as an exe
 def log_errors_to_file(log_file="error_log.txt"):
     sys.stdout = open(log_file, "w")
     sys.stderr = sys.stdout
 
-if getattr(sys, 'frozen', False):
-    log_errors_to_file()
-
 # Global variables
 selected_properties = set()
 available_properties = []
-parameter_checkboxes = {}  # Initialize the dictionary of checkboxes
-
-# Extract all parameters from the IFC files and save them to a text file
-def extract_and_save_parameters(ifc_directory, output_txt_file):
+property_picker = None  # The GUI's PropertyPicker, once the window is built
+
+# GUI jobs run on a worker thread and report back through gui_queue, which the Tk thread polls
+gui_queue = queue.Queue()
+cancel_event = threading.Event()
+POLL_INTERVAL_MS = 100
+
+# Output files create_combined_output can write: the combined CSV, the highlighted validation
+# workbook, the CCI violations list and typed Parquet / Feather copies of the combined table
+OUTPUT_FORMATS = ("csv", "xlsx", "violations") + COLUMNAR_FORMATS
+DEFAULT_FORMATS = ("csv", "xlsx", "violations")
+
+# Share of the progress bar given to parsing the models; writing the outputs fills the rest
+EXTRACT_PROGRESS = 0.7
+
+# Rows in an Excel sheet, header included; openpyxl's write-only mode doesn't enforce it
+EXCEL_MAX_ROWS = 1048576
+
+# Models at least this large are read with the low-memory STEP scanner instead of being loaded
+# whole by ifcopenshell, unless lazy loading is switched on or off explicitly
+LAZY_LOAD_MIN_BYTES = 1 << 30
+
+# Extract all parameters from the IFC files and save them to a text file.
+# Unchanged models are answered from their cached index; changed ones are parsed once and
+# their rows cached too, so the following export doesn't open them again.
+# Setting cancel_event raises ExportCancelled before the next file is started.
+# lazy picks how models are read, as in iter_ifc_properties.
+def extract_and_save_parameters(ifc_directory, output_txt_file, workers=None, cancel_event=None, lazy=None):
     global available_properties
     all_columns = set()
+    cache = IfcFileCache()
 
-    # Loop through each IFC file in the directory
-    for root, _, files in os.walk(ifc_directory):
-        for file_name in files:
-            if file_name.lower().endswith(".ifc"):
-                input_file_path = os.path.join(root, file_name)
-                print(f"Processing file: {input_file_path}")
-                ifc_file = ifcopenshell.open(input_file_path)
-                elements = ifc_file.by_type("IfcElement")
-
-                for element in elements:
-                    if hasattr(element, "IsDefinedBy"):
-                        for rel in element.IsDefinedBy:
-                            if rel.is_a("IfcRelDefinesByProperties"):
-                                prop_set = rel.RelatingPropertyDefinition
-                                if hasattr(prop_set, "HasProperties"):
-                                    for prop in prop_set.HasProperties:
-                                        if hasattr(prop, "Name"):
-                                            all_columns.add(prop.Name)
+    file_paths = find_ifc_files(ifc_directory)
+    stale_files = [path for path in file_paths if cache.get_index(path, properties=()) is None]
+    print(f"Indexing {len(stale_files)} of {len(file_paths)} IFC files ({len(file_paths) - len(stale_files)} unchanged)")
+    for input_file_path, _, _, error, _ in iter_extracted_files(stale_files, workers, cache, return_rows=False,
+                                                                cancel_event=cancel_event, lazy=lazy):
+        if error:
+            print(f"Error processing file {input_file_path}: {error}")
+
+    for input_file_path in file_paths:
+        index = cache.get_index(input_file_path, properties=())
+        if index is not None:
+            all_columns.update(index["properties"])
 
     # Save the available properties to a text file
     with open(output_txt_file, "w") as f:
@@ -58,131 +97,491 @@ def extract_and_save_parameters(ifc_directory, output_txt_file):
     print(f"Saved {len(available_properties)} parameters to {output_txt_file}")
 
 
-# Load selected properties from the checkbox list
+# Load selected properties from the checked entries of the parameter list
 def load_selected_properties_from_checkboxes():
     global selected_properties
-    # Create a set of parameters where the checkbox was checked (var.get() is True)
-    selected_properties = {param for param, var in parameter_checkboxes.items() if var.get()}
+    selected_properties = property_picker.checked()
     print(f"Selected properties: {selected_properties}")
 
 
-# Process all IFC files in a directory
-def process_ifc_directory(input_dir, output_dir):
+# Find every IFC file under a directory in a single walk
+def find_ifc_files(input_dir):
+    return [os.path.join(root, f) for root, _, files in os.walk(input_dir) for f in files if f.lower().endswith(".ifc")]
+
+
+# Process all IFC files in a directory.
+# workers=None parses one file per core; workers=1 parses in this process.
+# With use_cache the export is incremental: only new or changed models are parsed, the rest are
+# merged in from the IfcFileCache. verify_content also treats a model whose mtime changed but
+# whose content hash did not as unchanged.
+# formats picks which of OUTPUT_FORMATS to write.
+# Only the property names in properties (every property when None or empty) are extracted and
+# exported, and only elements of entity_types (IFC class names, subtypes included) when given.
+# lazy picks how models are read, as in iter_ifc_properties.
+# Timings, counters and progress go to stats (a PipelineStats); a timing summary is printed at the end.
+# Setting stats.cancel_event raises ExportCancelled between files and between outputs.
+# Returns ({format: output path}, {file_path: error} for files that could not be parsed).
+def process_ifc_directory(input_dir, output_dir, workers=None, use_cache=True, verify_content=False,
+                          formats=DEFAULT_FORMATS, properties=None, entity_types=None, stats=None, lazy=None):
+    stats = stats if stats is not None else PipelineStats()
     os.makedirs(output_dir, exist_ok=True)
 
-    files_to_process = [f for root, _, files in os.walk(input_dir) for f in files if f.lower().endswith(".ifc")]
+    with stats.stage("discover"):
+        files_to_process = find_ifc_files(input_dir)
     total_files = len(files_to_process)
+    stats.count("files", total_files)
 
     if total_files == 0:
         print("No IFC files found.")
-        return
+        return {}, {}
 
-    all_element_data = []
     all_columns = set()
-
-    # Loop through each file and extract data
-    for root, _, files in os.walk(input_dir):
-        for file_name in files:
-            if file_name.lower().endswith(".ifc"):
-                input_file_path = os.path.join(root, file_name)
-                print(f"Processing file: {input_file_path}")
-
-                element_data, columns = extract_ifc_properties(input_file_path)
-                all_element_data.extend(element_data)
+    failed_files = {}
+    properties = frozenset(properties) if properties else None
+    entity_types = frozenset(entity_types) if entity_types else None
+
+    # Spool rows to disk as each file is parsed so memory stays bounded by one batch of elements
+    with RowSpool() as all_element_data:
+        cache = IfcFileCache(verify_content=verify_content) if use_cache else None
+        stats.progress(0.0, f"Processing {total_files} IFC files...")
+        with stats.stage("extract"):
+            extracted = iter_extracted_files(files_to_process, workers, cache, properties=properties,
+                                             entity_types=entity_types, profile_dir=stats.profile_dir,
+                                             cancel_event=stats.cancel_event, lazy=lazy)
+            for done, (input_file_path, element_data, columns, error, file_stats) in enumerate(extracted, 1):
+                if file_stats:
+                    stats.merge(file_stats)
+                stats.record_file(input_file_path, file_stats["total_seconds"] if file_stats else None, len(element_data),
+                                  cached=bool(file_stats and "cache_load" in file_stats["stages"]), error=error)
+                stats.progress(EXTRACT_PROGRESS * done / total_files,
+                               f"Processed {done} of {total_files} files: {os.path.basename(input_file_path)}")
+                if error:
+                    print(f"Error processing file {input_file_path}: {error}")
+                    failed_files[input_file_path] = error
+                    stats.count("failed_files")
+                    continue
+                print(f"Processed file: {input_file_path} ({len(element_data)} elements)")
+                stats.count("elements", len(element_data))
+                with stats.stage("extract.spool"):
+                    all_element_data.extend(element_data)
                 all_columns.update(columns)
 
-    # Now we process the data and write it to CSV and Excel
-    create_combined_output(all_element_data, sorted(all_columns), output_dir)
+        # Now we process the data and write it to CSV and Excel
+        with stats.profile("outputs"):
+            outputs = create_combined_output(all_element_data, sorted(all_columns), output_dir, formats, properties, stats)
+
+    if failed_files:
+        print(f"{len(failed_files)} of {total_files} files failed: {sorted(failed_files)}")
+    stats.progress(1.0, "Processing complete.")
+    print(stats.format_summary())
+    return outputs, failed_files
+
+
+# Parse one file in a worker; returns (file_path, element_data, columns, error, stats summary).
+# The rows are spooled to rows_path as they are extracted and returned as SpooledRows, so neither
+# this process nor the caller holds a whole model's rows; without a rows_path none are returned.
+# With a cache_dir the parsed model is indexed and stored there, along with its content hash when
+# verify_content is set (see IfcFileCache).
+# With a profile_dir the parse is recorded with cProfile to profile_dir/parse-<file name>-<path hash>.prof.
+def _extract_file_job(ifc_file_path, cache_dir=None, rows_path=None, properties=None, entity_types=None,
+                      profile_dir=None, lazy=None, verify_content=False):
+    stats = PipelineStats(profile_dir=profile_dir)
+    try:
+        path_hash = hashlib.sha1(os.path.abspath(ifc_file_path).encode("utf-8")).hexdigest()[:8]
+        with RowSpool(path=rows_path) as element_data:
+            with stats.profile(f"parse-{os.path.basename(ifc_file_path)}-{path_hash}"), stats.stage("parse"):
+                file_key = IfcFileCache.file_key(ifc_file_path, with_hash=bool(cache_dir and verify_content))
+                all_columns, property_names, property_sets = set(), set(), set()
+                element_data.extend(iter_ifc_properties(ifc_file_path, all_columns, property_names, property_sets,
+                                                        properties, entity_types, stats, lazy))
+            columns = sorted(all_columns)
+            if cache_dir:
+                with stats.stage("cache_store"):
+                    IfcFileCache(cache_dir).store(ifc_file_path, file_key, element_data, columns, property_names,
+                                                  property_sets, properties, entity_types)
+        rows = SpooledRows(rows_path, len(element_data)) if rows_path else []
+        return ifc_file_path, rows, columns, None, stats.summary()
+    except Exception as e:
+        return ifc_file_path, [], [], str(e), stats.summary()
+
+
+# Yield (file_path, element_data, columns, error, stats summary) for each file in input order,
+# parsing up to `workers` files at once in separate processes. The stats summary is None only
+# when a parser process died; only the file that crashed it fails, and the pool is replaced.
+# element_data is read from disk as it is iterated and is only valid until the next file is yielded.
+# Files unchanged in the cache are returned from it without being parsed.
+# properties and entity_types restrict what is extracted and lazy picks how models are read, as in
+# iter_ifc_properties.
+# Once cancel_event is set, files not yet started are dropped, the ones being parsed are let
+# finish, and ExportCancelled is raised.
+def iter_extracted_files(file_paths, workers=None, cache=None, return_rows=True, properties=None, entity_types=None,
+                         profile_dir=None, cancel_event=None, lazy=None):
+    cache_dir = cache.cache_dir if cache else None
+    verify_content = cache.verify_content if cache else False
+    # Workers spool each file's rows here for this process to read back
+    spool_dir = tempfile.mkdtemp(prefix="ifc2csv-rows-") if return_rows else None
+
+    def job_args(ifc_file_path):
+        rows_path = None
+        if spool_dir:
+            name = hashlib.sha1(os.path.abspath(ifc_file_path).encode("utf-8")).hexdigest()
+            rows_path = os.path.join(spool_dir, f"{name}.rows")
+        return ifc_file_path, cache_dir, rows_path, properties, entity_types, profile_dir, lazy, verify_content
+
+    def check_cancelled(pending=()):
+        if cancel_event is not None and cancel_event.is_set():
+            for _, result in pending:
+                if isinstance(result, Future):
+                    result.cancel()
+            raise ExportCancelled()
+
+    def cached_result(ifc_file_path):
+        if not (cache and return_rows):
+            return None
+        stats = PipelineStats()
+        with stats.stage("cache_load"):
+            cached = cache.load_rows(ifc_file_path, properties, entity_types)
+        if cached is None:
+            return None
+        print(f"Using cached rows: {ifc_file_path}")
+        stats.count("cached_files")
+        return (ifc_file_path, *cached, None, stats.summary())
+
+    def extracted():
+        if workers == 1:
+            for ifc_file_path in file_paths:
+                check_cancelled()
+                yield cached_result(ifc_file_path) or _extract_file_job(*job_args(ifc_file_path))
+            return
+
+        pool_size = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=pool_size)
+        pending = deque()
+
+        # A parser process that dies (e.g. ifcopenshell crashing on a corrupt model) breaks the whole
+        # pool, failing every unfinished file with it. Each of those is parsed again in a process of
+        # its own, so only the file that crashed fails, and the rest go on in a new pool.
+        def replace_broken_pool():
+            nonlocal pool
+            pool.shutdown(wait=True)
+            broken = [index for index, (_, result) in enumerate(pending)
+                      if isinstance(result, Future) and not result.cancelled()
+                      and isinstance(result.exception(), BrokenProcessPool)]
+            isolated = _extract_files_isolated([pending[index][0] for index in broken], job_args, pool_size)
+            for index, result in zip(broken, isolated):
+                pending[index] = (pending[index][0], result)
+            pool = ProcessPoolExecutor(max_workers=pool_size)
+
+        def submit(ifc_file_path):
+            try:
+                return pool.submit(_extract_file_job, *job_args(ifc_file_path))
+            except BrokenProcessPool:
+                replace_broken_pool()
+                return pool.submit(_extract_file_job, *job_args(ifc_file_path))
+
+        def collect():
+            result = pending[0][1]
+            if isinstance(result, Future):
+                try:
+                    result.result()
+                except BrokenProcessPool:
+                    replace_broken_pool()
+                except Exception:
+                    pass
+            return _collect_extracted_file(*pending.popleft())
+
+        try:
+            for ifc_file_path in file_paths:
+                check_cancelled(pending)
+                result = cached_result(ifc_file_path)
+                pending.append((ifc_file_path, result or submit(ifc_file_path)))
+                # Bound the files in flight so finished results don't pile up behind a slow one
+                if len(pending) >= pool_size * 2:
+                    yield collect()
+            while pending:
+                check_cancelled(pending)
+                yield collect()
+        finally:
+            pool.shutdown(wait=True)
+
+    results = extracted()
+    try:
+        for result in results:
+            yield result
+            # The caller has read this file's rows by now; don't keep a second copy on disk
+            if isinstance(result[1], SpooledRows):
+                result[1].discard()
+    finally:
+        results.close()
+        if spool_dir:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+# Parse each file in a single-process pool of its own, up to `workers` at once, so a crash can
+# only fail the file that caused it. job_args(file_path) gives a job's arguments.
+# Returns the results in the order of file_paths.
+def _extract_files_isolated(file_paths, job_args, workers):
+    results = []
+    for start in range(0, len(file_paths), workers):
+        jobs = []
+        for ifc_file_path in file_paths[start:start + workers]:
+            pool = ProcessPoolExecutor(max_workers=1)
+            jobs.append((ifc_file_path, pool, pool.submit(_extract_file_job, *job_args(ifc_file_path))))
+        for ifc_file_path, pool, future in jobs:
+            results.append(_collect_extracted_file(ifc_file_path, future))
+            pool.shutdown(wait=True)
+    return results
+
+
+def _collect_extracted_file(ifc_file_path, result):
+    if not isinstance(result, Future):
+        return result
+    try:
+        return result.result()
+    except Exception as e:
+        # The worker process itself died, e.g. ifcopenshell crashed on a corrupt model
+        return ifc_file_path, [], [], str(e), None
 
 
 # Extract properties from IFC file
-def extract_ifc_properties(ifc_file_path):
-    print(f"Processing: {ifc_file_path}")
-    ifc_file = ifcopenshell.open(ifc_file_path)
-    elements = ifc_file.by_type("IfcElement")
-
-    element_data = []
+def extract_ifc_properties(ifc_file_path, properties=None, entity_types=None, lazy=None):
     all_columns = set()
+    element_data = list(iter_ifc_properties(ifc_file_path, all_columns, only_properties=properties, entity_types=entity_types,
+                                            lazy=lazy))
+    return element_data, sorted(all_columns)
 
-    for element in elements:
+
+# Yield one properties dict per IfcElement, adding every exported property name to all_columns.
+# property_names and property_sets, when given, collect every named property and property set seen.
+# only_properties limits the decoded values to those names (GlobalId, Name and Type are always
+# kept); entity_types limits the elements to those IFC classes and their subtypes. None means all.
+# stats, a PipelineStats, times opening the model and indexing its property sets.
+# lazy=True reads the model with the streaming STEP scanner (stepscan) in a fraction of the memory;
+# lazy=None does so for files of LAZY_LOAD_MIN_BYTES or more. The scanner gives the same rows as
+# ifcopenshell, and a statement it can't read fails the file rather than dropping its element.
+def iter_ifc_properties(ifc_file_path, all_columns, property_names=None, property_sets=None,
+                        only_properties=None, entity_types=None, stats=None, lazy=None):
+    stats = stats if stats is not None else PipelineStats()
+    print(f"Processing: {ifc_file_path}")
+    if lazy or (lazy is None and os.path.getsize(ifc_file_path) >= LAZY_LOAD_MIN_BYTES):
+        yield from iter_step_properties(ifc_file_path, all_columns, property_names, property_sets,
+                                        only_properties, entity_types, stats)
+        return
+    with stats.stage("parse.open"):
+        ifc_file = ifcopenshell.open(ifc_file_path)
+
+    # Walk the property relationships once instead of each element's IsDefinedBy, then decode each
+    # property set the first time an element uses it: a set shared by thousands of elements is
+    # decoded a single time and fanned out to all of them. Relationships come back in the same
+    # order as IsDefinedBy, so later sets still win on duplicate property names exactly as before.
+    sets_by_object = {}
+    with stats.stage("parse.index"):
+        for rel in ifc_file.by_type("IfcRelDefinesByProperties"):
+            prop_set = rel.RelatingPropertyDefinition
+            if not hasattr(prop_set, "HasProperties"):
+                continue
+            for related_object in rel.RelatedObjects:
+                sets_by_object.setdefault(related_object.id(), []).append(prop_set)
+
+    decoded_sets = {}
+    for element in ifc_file.by_type("IfcElement"):
+        if entity_types and not any(element.is_a(entity_type) for entity_type in entity_types):
+            continue
         element_id = element.GlobalId
         element_name = element.Name if element.Name else "Unknown"
         element_type = element.is_a()
         properties = {"GlobalId": element_id, "Name": element_name, "Type": element_type}
 
-        if hasattr(element, "IsDefinedBy"):
-            for rel in element.IsDefinedBy:
-                if rel.is_a("IfcRelDefinesByProperties"):
-                    prop_set = rel.RelatingPropertyDefinition
-                    if hasattr(prop_set, "HasProperties"):
-                        for prop in prop_set.HasProperties:
-                            if hasattr(prop, "Name") and hasattr(prop, "NominalValue"):
-                                prop_name = prop.Name
-                                prop_value = prop.NominalValue.wrappedValue
-                                properties[prop_name] = prop_value
-                                all_columns.add(prop_name)
-
-        element_data.append(properties)
-
-    return element_data, sorted(all_columns)
-
-
-# Combine the data and create both CSV and Excel outputs
-def create_combined_output(all_element_data, all_columns, output_dir):
+        for prop_set in sets_by_object.get(element.id(), ()):
+            values = decoded_sets.get(prop_set.id())
+            if values is None:
+                values, names = _decode_property_set(prop_set, only_properties)
+                decoded_sets[prop_set.id()] = values
+                all_columns.update(values)
+                if property_names is not None:
+                    property_names.update(names)
+                if property_sets is not None:
+                    property_sets.add(prop_set.Name)
+            properties.update(values)
+
+        yield properties
+
+
+# Decode an IfcPropertySet into ({property name: value}, every property name).
+# Only the values of names in only_properties are read, unless it is None.
+def _decode_property_set(prop_set, only_properties=None):
+    values = {}
+    names = []
+    for prop in prop_set.HasProperties:
+        if hasattr(prop, "Name"):
+            name = prop.Name
+            names.append(name)
+            if (only_properties is None or name in only_properties) and hasattr(prop, "NominalValue"):
+                values[name] = prop.NominalValue.wrappedValue
+    return values, names
+
+
+# Add a single quote before any value starting with "=" so spreadsheets don't read it as a formula
+def escape_formula(value):
+    if isinstance(value, str) and value.startswith("="):
+        return "'" + value
+    return value
+
+
+# Combine the data and create the requested outputs; returns {format: output path}.
+# all_element_data can be a list or a RowSpool; it is iterated once per output.
+# Only the columns in properties are written, unless it is None or empty.
+# The workbook is skipped when the rows don't fit in an Excel sheet; the CSV and the violations
+# file are still written.
+# Each output is timed as a write_<format> stage of stats and moves the progress on.
+def create_combined_output(all_element_data, all_columns, output_dir, formats=DEFAULT_FORMATS, properties=None,
+                           stats=None):
+    stats = stats if stats is not None else PipelineStats()
     # Filter data by selected columns
-    if selected_properties:
-        all_columns = [col for col in all_columns if col in selected_properties]
-
-    csv_output_path = os.path.join(output_dir, "combined_output.csv")
-    with open(csv_output_path, mode="w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=all_columns)
-        writer.writeheader()
-        for data in all_element_data:
-            # Write only selected columns to the CSV
-            filtered_data = {key: data.get(key, "") for key in all_columns}
-            # Add a single quote before any value starting with "="
-            for k, v in filtered_data.items():
-                if isinstance(v, str) and v.startswith("="):
-                    filtered_data[k] = "'" + v
-            writer.writerow(filtered_data)
-
-    print(f"Saved CSV: {csv_output_path}")
-
-    # Create Excel output
-    create_excel_output(all_element_data, all_columns, output_dir)
-
-
-# Create the Excel output
-def create_excel_output(all_element_data, all_columns, output_dir):
+    if properties:
+        all_columns = [col for col in all_columns if col in properties]
+
+    if "xlsx" in formats and len(all_element_data) >= EXCEL_MAX_ROWS:
+        print(f"Skipping Excel output: {len(all_element_data)} rows don't fit in an Excel sheet "
+              f"({EXCEL_MAX_ROWS - 1} rows plus the header)")
+        formats = [fmt for fmt in formats if fmt != "xlsx"]
+
+    # Outputs in the order they are written; violations come with the workbook when both are asked for
+    steps = [fmt for fmt in ("csv",) + COLUMNAR_FORMATS + ("xlsx", "violations") if fmt in formats]
+    if "xlsx" in steps and "violations" in steps:
+        steps.remove("violations")
+
+    def start_step(file_format):
+        stats.check_cancelled()
+        step = steps.index(file_format)
+        stats.progress(EXTRACT_PROGRESS + (1 - EXTRACT_PROGRESS) * step / len(steps), f"Writing {file_format} output...")
+        return stats.stage(f"write_{file_format}")
+
+    outputs = {}
+    if "csv" in formats:
+        csv_output_path = os.path.join(output_dir, "combined_output.csv")
+        with start_step("csv"), open(csv_output_path, mode="w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=all_columns)
+            writer.writeheader()
+            for data in all_element_data:
+                # Write only selected columns to the CSV
+                writer.writerow({key: escape_formula(data.get(key, "")) for key in all_columns})
+
+        print(f"Saved CSV: {csv_output_path}")
+        outputs["csv"] = csv_output_path
+
+    for file_format in COLUMNAR_FORMATS:
+        if file_format in formats:
+            output_path = os.path.join(output_dir, f"combined_output.{file_format}")
+            with start_step(file_format):
+                outputs[file_format] = write_columnar(all_element_data, all_columns, output_path, file_format)
+
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    violations_file = os.path.join(output_dir, f"validation_violations_{timestamp}.csv")
+    if "xlsx" in formats:
+        # Create Excel output
+        with start_step("xlsx"):
+            outputs["xlsx"] = create_excel_output(all_element_data, all_columns, output_dir, timestamp,
+                                                  violations_file if "violations" in formats else None, stats)
+        if "violations" in formats and os.path.exists(violations_file):
+            outputs["violations"] = violations_file
+    elif "violations" in formats:
+        if all(col in all_columns for col in CCI_REQUIRED_COLUMNS):
+            with start_step("violations"):
+                stats.count("violations", write_cci_violations(all_element_data, violations_file))
+            outputs["violations"] = violations_file
+        else:
+            print(f"Skipping CCI violations, missing columns: {[col for col in CCI_REQUIRED_COLUMNS if col not in all_columns]}")
+
+    return outputs
+
+
+# Create the Excel output and return its path
+def create_excel_output(all_element_data, all_columns, output_dir, timestamp=None, violations_file=None, stats=None):
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d%H%M%S")
     validation_file = os.path.join(output_dir, f"validation_output_{timestamp}.xlsx")
     print(f"Saving validation file to: {validation_file}")
 
-    # Create dataframe for Excel
-    final_df = pd.DataFrame(all_element_data)
-    final_df = final_df[all_columns]
-    # Prepend a single quote if any cell's string value starts with "="
-    final_df = final_df.applymap(lambda x: "'" + x if isinstance(x, str) and x.startswith("=") else x)
-
     try:
-        final_df.to_excel(validation_file, index=False)
-        validate_excel(validation_file)
-        print(f"Validation file created at: {validation_file}")
-        messagebox.showinfo(
-            "Processing Complete",
-            f"Processing complete!\n\nClick 'OK' to open the validation file.",
-        )
-        webbrowser.open(f"file://{validation_file}")
+        write_validation_workbook(all_element_data, all_columns, validation_file, violations_file, stats)
     except Exception as e:
         print(f"Error creating Excel: {e}")
-        messagebox.showerror("Error", f"Error creating Excel: {e}")
+        raise
+    print(f"Validation file created at: {validation_file}")
+    return validation_file
+
+
+RED_FILL = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+
+
+# Write the validation workbook in a single streaming pass, applying the CCI red fills as rows are
+# written instead of saving, reopening and saving the workbook again in validate_excel.
+# With violations_file, the failed checks are also listed there (GlobalId, column, expected, actual).
+# The CCI checks and the final save are timed as write_xlsx.validate and write_xlsx.save in stats.
+# Raises ValueError if the rows don't fit in an Excel sheet (EXCEL_MAX_ROWS, header included).
+def write_validation_workbook(all_element_data, all_columns, validation_file, violations_file=None, stats=None):
+    stats = stats if stats is not None else PipelineStats()
+    if len(all_element_data) >= EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(all_element_data)} rows don't fit in an Excel sheet ({EXCEL_MAX_ROWS - 1} rows plus the header)")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    header_font = Font(bold=True)
+    header_border = Border(*(Side(style="thin"),) * 4)
+    header_alignment = Alignment(horizontal="center", vertical="top")
+    header_cells = []
+    for column in all_columns:
+        cell = WriteOnlyCell(ws, value=column)
+        cell.font, cell.border, cell.alignment = header_font, header_border, header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    print(f"Columns in Excel: {list(all_columns)}")
+    missing_columns = [col for col in CCI_REQUIRED_COLUMNS if col not in all_columns]
+    if missing_columns:
+        print(f"Missing columns in Excel: {missing_columns}")
+    column_positions = {column: position for position, column in enumerate(all_columns)}
 
+    violations_csv = None
+    if violations_file and not missing_columns:
+        violations_csv = open(violations_file, mode="w", newline="", encoding="utf-8")
+        violations_csv.write(",".join(VIOLATION_FIELDS) + "\n")
+    violation_count = 0
 
-# Validate Excel and apply error highlighting
+    try:
+        # Checks are evaluated a batch at a time, column-wise, rather than cell by cell
+        for batch in iter_batches(all_element_data):
+            failed_cells = {}
+            if not missing_columns:
+                with stats.stage("write_xlsx.validate"):
+                    violations = check_cci_batch(batch)
+                for offset, column in zip(violations["offset"].tolist(), violations["column"].tolist()):
+                    failed_cells.setdefault(offset, []).append(column_positions[column])
+                violation_count += len(violations)
+                if violations_csv:
+                    violations.to_csv(violations_csv, columns=VIOLATION_FIELDS, header=False, index=False, lineterminator="\n")
+
+            for offset, data in enumerate(batch):
+                row = [escape_formula(data.get(column)) for column in all_columns]
+                for position in failed_cells.get(offset, ()):
+                    row[position] = WriteOnlyCell(ws, value=row[position])
+                    row[position].fill = RED_FILL
+                ws.append(row)
+    finally:
+        if violations_csv:
+            violations_csv.close()
+
+    with stats.stage("write_xlsx.save"):
+        wb.save(validation_file)
+    if not missing_columns:
+        stats.count("violations", violation_count)
+    if violations_csv:
+        print(f"Saved {violation_count} CCI violations to: {violations_file}")
+
+
+# Validate an existing Excel file and apply error highlighting
 def validate_excel(excel_path):
     wb = load_workbook(excel_path)
     ws = wb.active
-    red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
 
     # Get header row and map column names to their positions
     header_row = [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
@@ -190,43 +589,17 @@ def validate_excel(excel_path):
     print(f"Columns in Excel: {header_row}")
 
     # Check if all required columns exist in the Excel sheet
-    required_columns = [
-        "CCILevel1ParentLocationID", "CCILevel1ParentTypeID",
-        "CCILevel2ParentLocationID", "CCILevel2ParentTypeID",
-        "CCILocationID", "CCIMultiLevelLocationID", "CCIMultiLevelTypeID"
-    ]
-
-    missing_columns = [col for col in required_columns if col not in header_row]
+    missing_columns = [col for col in CCI_REQUIRED_COLUMNS if col not in header_row]
     if missing_columns:
         print(f"Missing columns in Excel: {missing_columns}")
         return
 
-    try:
-        # Perform validation for each row based on the selected columns
-        idx_CCILevel1ParentLocationID = header_row.index("CCILevel1ParentLocationID")
-        idx_CCILevel1ParentTypeID = header_row.index("CCILevel1ParentTypeID")
-        idx_CCILevel2ParentLocationID = header_row.index("CCILevel2ParentLocationID")
-        idx_CCILevel2ParentTypeID = header_row.index("CCILevel2ParentTypeID")
-        idx_CCILocationID = header_row.index("CCILocationID")
-        idx_CCIMultiLevelLocationID = header_row.index("CCIMultiLevelLocationID")
-        idx_CCIMultiLevelTypeID = header_row.index("CCIMultiLevelTypeID")
-    except ValueError as e:
-        print(f"Required columns not found in the sheet: {e}")
-        return
-
+    column_positions = {column: header_row.index(column) for column in CCI_REQUIRED_COLUMNS}
     for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-        CCILevel2ParentTypeID = str(row[idx_CCILevel2ParentTypeID].value)
-        CCILevel1ParentTypeID = str(row[idx_CCILevel1ParentTypeID].value)
-        expected_type_id = f"§{CCILevel2ParentTypeID}.{CCILevel1ParentTypeID}"
-        if str(row[idx_CCIMultiLevelTypeID].value) != expected_type_id:
-            row[idx_CCIMultiLevelTypeID].fill = red_fill
-
-        CCILevel2ParentLocationID = str(row[idx_CCILevel2ParentLocationID].value)
-        CCILevel1ParentLocationID = str(row[idx_CCILevel1ParentLocationID].value)
-        CCILocationID = str(row[idx_CCILocationID].value)
-        expected_location_id = f"+{CCILevel2ParentLocationID}.{CCILevel1ParentLocationID}.{CCILocationID}"
-        if str(row[idx_CCIMultiLevelLocationID].value) != expected_location_id:
-            row[idx_CCIMultiLevelLocationID].fill = red_fill
+        row_text = {column: str(row[position].value) for column, position in column_positions.items()}
+        for column, expected in expected_cci_values(row_text).items():
+            if row_text[column] != expected:
+                row[column_positions[column]].fill = RED_FILL
 
     wb.save(excel_path)
 
@@ -245,6 +618,17 @@ def select_output_directory():
     output_dir_entry.insert(0, output_dir)
 
 
+# Save the checked parameters as a property list file, in the same format as PSet.txt
+def save_property_list_file():
+    property_file_path = filedialog.asksaveasfilename(title="Save Property List File", defaultextension=".txt",
+                                                      filetypes=[("Text Files", "*.txt")])
+    if property_file_path:
+        with open(property_file_path, "w") as f:
+            for param in sorted(property_picker.checked()):
+                f.write(f"{param}\n")
+        property_file_label.config(text=f"Saved properties to: {property_file_path}")
+
+
 # Select parameter list file
 def select_property_list_file():
     property_file_path = filedialog.askopenfilename(title="Select Property List File", filetypes=[("Text Files", "*.txt")])
@@ -260,13 +644,88 @@ def load_selected_properties(property_file_path):
         properties = [line.strip() for line in f if line.strip()]
         selected_properties = set(properties)
     
-    # Update checkbox states if they are already loaded.
-    for param, var in parameter_checkboxes.items():
-        var.set(param in selected_properties)
+    # Update the checked parameters if they are already listed.
+    if property_picker is not None:
+        property_picker.set_checked(selected_properties)
     
     print(f"Loaded selected properties from file: {selected_properties}")
 
 
+# Run job() on a worker thread so the window stays responsive while models are parsed.
+# Progress and the outcome come back through gui_queue; on_done(result) runs on the Tk thread.
+def start_background_job(job, on_done, status):
+    cancel_event.clear()
+    set_job_running(True)
+    progress_var.set(0)
+    progress_label.config(text=status)
+
+    def run():
+        try:
+            gui_queue.put(("done", on_done, job()))
+        except ExportCancelled:
+            gui_queue.put(("cancelled", None, None))
+        except Exception as e:
+            gui_queue.put(("error", None, e))
+
+    threading.Thread(target=run, daemon=True).start()
+    app.after(POLL_INTERVAL_MS, poll_gui_queue)
+
+
+# Apply queued progress updates on the Tk thread, until the job's outcome arrives
+def poll_gui_queue():
+    while True:
+        try:
+            kind, on_done, value = gui_queue.get_nowait()
+        except queue.Empty:
+            app.after(POLL_INTERVAL_MS, poll_gui_queue)
+            return
+        if kind == "progress":
+            fraction, message = value
+            progress_var.set(fraction * 100)
+            progress_label.config(text=message)
+            continue
+
+        set_job_running(False)
+        if kind == "done":
+            on_done(value)
+        elif kind == "cancelled":
+            progress_label.config(text="Cancelled.")
+        else:
+            progress_label.config(text="Failed.")
+            messagebox.showerror("Error", f"An error occurred: {str(value)}")
+        return
+
+
+# Called on the worker thread; only queues the update for the Tk thread
+def queue_progress(fraction, message):
+    gui_queue.put(("progress", None, (fraction, message)))
+
+
+def set_job_running(running):
+    state = "disabled" if running else "normal"
+    parameters_button.config(state=state)
+    if running or available_properties:
+        start_button.config(state=state)
+    cancel_button.config(state="normal" if running else "disabled")
+
+
+# Stop the running job once the files being parsed are done
+def cancel_job():
+    cancel_event.set()
+    cancel_button.config(state="disabled")
+    progress_label.config(text="Cancelling after the current files...")
+
+
+# Get available parameters in the background, then list them for selection
+def get_available_parameters():
+    input_dir = input_dir_entry.get()
+    if not input_dir:
+        messagebox.showerror("Error", "Please select an input directory.")
+        return
+    start_background_job(lambda: extract_and_save_parameters(input_dir, "available_parameters.txt", cancel_event=cancel_event),
+                         lambda _: load_checkboxes(), "Reading available parameters...")
+
+
 # Start processing
 def start_processing():
     load_selected_properties_from_checkboxes()
@@ -282,97 +741,190 @@ def start_processing():
         messagebox.showerror("Error", "Please select at least one parameter to export.")
         return
 
-    try:
-        print("Starting IFC to CSV conversion...")
-        progress_var.set(0)
-        progress_label.config(text="Initializing file processing...")
-        process_ifc_directory(input_dir, output_dir)
-        messagebox.showinfo("Success", "Processing complete! CSV files and validation sheet saved.")
-    except Exception as e:
-        messagebox.showerror("Error", f"An error occurred: {str(e)}")
-
-
-# Create Tkinter app
-app = tk.Tk()
-app.title("IFC to CSV Converter - (CC) balaji.work")
-app.geometry("600x700")
-
-tk.Label(app, text="Created for Eastern Ring Road Project by Balaji Balagurusami babs@cowi.com for COWI A/S.", fg="blue").pack(pady=5)
-tk.Label(app, text="License: Creative Commons 0 1.0 Universal", fg="blue").pack(pady=5)
-
-def open_github():
-    webbrowser.open_new("https://github.com/balajibalagurusami/python/")
-
-github_label = tk.Label(app, text="GitHub Repo", fg="blue", cursor="hand2")
-github_label.pack(pady=5)
-github_label.bind("<Button-1>", lambda e: open_github())
-
-# Input directory
-tk.Label(app, text="Select Input Directory:").pack()
-input_dir_entry = tk.Entry(app, width=60)
-input_dir_entry.pack(pady=5)
-tk.Button(app, text="Browse", command=select_input_directory).pack()
-
-# Output directory
-tk.Label(app, text="Select Output Directory:").pack(pady=5)
-output_dir_entry = tk.Entry(app, width=60)
-output_dir_entry.pack(pady=5)
-tk.Button(app, text="Browse", command=select_output_directory).pack()
-
-# Property list selection
-tk.Button(app, text="Load Property List", command=select_property_list_file).pack(pady=5)
-property_file_label = tk.Label(app, text="No property list loaded.")
-property_file_label.pack(pady=5)
-
-# Scrollable frame for parameters
-scroll_frame = tk.Frame(app)
-scroll_frame.pack(pady=10)
+    # Add the running throughput to each progress message
+    def show_progress(fraction, message):
+        elements = stats.counters.get("elements", 0)
+        elapsed = time.perf_counter() - stats.started
+        if elements and elapsed > 0:
+            message = f"{message} ({elements / elapsed:,.0f} elements/s)"
+        queue_progress(fraction, message)
 
-# Create canvas and scrollbar for scrolling
-canvas = tk.Canvas(scroll_frame)
-scrollbar = tk.Scrollbar(scroll_frame, orient="vertical", command=canvas.yview)
-canvas.config(yscrollcommand=scrollbar.set)
+    # The export thread gets its own copy of the selection made on the Tk thread
+    properties = frozenset(selected_properties)
 
-scrollable_frame = tk.Frame(canvas)
+    def export():
+        outputs, failed_files = process_ifc_directory(input_dir, output_dir, properties=properties, stats=stats)
+        stats.write_json(os.path.join(output_dir, "export_timings.json"))
+        return outputs, failed_files
 
-# Create the window inside the canvas
-canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+    print("Starting IFC to CSV conversion...")
+    stats = PipelineStats(progress_callback=show_progress, cancel_event=cancel_event)
+    start_background_job(export, finish_processing, "Initializing file processing...")
 
-scrollbar.pack(side="right", fill="y")
-canvas.pack(side="left", fill="both", expand=True)
 
-def load_checkboxes():
-    global parameter_checkboxes
-    # Clear previous checkboxes
-    for widget in scrollable_frame.winfo_children():
-        widget.destroy()
-
-    parameter_checkboxes = {}
+# Report a finished export
+def finish_processing(result):
+    outputs, failed_files = result
+    if "xlsx" in outputs:
+        messagebox.showinfo(
+            "Processing Complete",
+            f"Processing complete!\n\nClick 'OK' to open the validation file.",
+        )
+        webbrowser.open(f"file://{outputs['xlsx']}")
+    if failed_files:
+        messagebox.showwarning("Completed with errors", f"{len(failed_files)} file(s) could not be read:\n\n" + "\n".join(sorted(failed_files)))
+    else:
+        messagebox.showinfo("Success", "Processing complete! CSV files and validation sheet saved.")
 
-    for param in available_properties:
-        var = tk.BooleanVar()
-        cb = tk.Checkbutton(scrollable_frame, text=param, variable=var)
-        cb.pack(anchor="w")
-        parameter_checkboxes[param] = var
 
-    # Update scroll region
-    scrollable_frame.update_idletasks()
-    canvas.config(scrollregion=canvas.bbox("all"))
+# Exit codes for the command line
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2  # argparse's own code for bad arguments
+EXIT_PARTIAL = 3  # outputs written, but some IFC files could not be read
 
-    # Enable the Start Processing button after loading checkboxes
-    start_button.config(state="normal")
+# --lazy choices and the lazy argument each stands for
+LAZY_MODES = {"auto": None, "always": True, "never": False}
 
-# "Get Available Parameters" Button
-tk.Button(app, text="Get Available Parameters", 
-          command=lambda: [extract_and_save_parameters(input_dir_entry.get(), "available_parameters.txt"), load_checkboxes()]).pack(pady=5)
 
-# Start button and progress bar
-start_button = tk.Button(app, text="Start Processing", command=start_processing, state="disabled")
-start_button.pack(pady=10)
-progress_var = tk.DoubleVar()
-progress_bar = ttk.Progressbar(app, variable=progress_var, length=400)
-progress_bar.pack(pady=5)
-progress_label = tk.Label(app, text="")
-progress_label.pack()
+# Headless entry point for unattended exports, e.g.
+#   python ifc2csv.py <input_dir> <output_dir> --properties PSet.txt --workers 8 --formats csv,xlsx
+# Returns the process exit code.
+def main(argv=None):
+    global selected_properties
+    parser = argparse.ArgumentParser(description="Export IFC element properties to CSV/XLSX without the GUI.")
+    parser.add_argument("input_dir", help="directory searched recursively for .ifc files")
+    parser.add_argument("output_dir", nargs="?", help="directory for the exported files")
+    parser.add_argument("--properties", metavar="FILE",
+                        help="property list, one name per line like PSet.txt (default: export every property)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: one per core)")
+    parser.add_argument("--formats", default=",".join(DEFAULT_FORMATS),
+                        help=f"comma-separated outputs from {', '.join(OUTPUT_FORMATS)} "
+                             f"(default: {','.join(DEFAULT_FORMATS)})")
+    parser.add_argument("--list-parameters", metavar="FILE",
+                        help="only write the available parameters to FILE, like 'Get Available Parameters'")
+    parser.add_argument("--entity-types", metavar="TYPES",
+                        help="comma-separated IFC classes to export, subtypes included, e.g. IfcWall,IfcDoor "
+                             "(default: every IfcElement)")
+    parser.add_argument("--no-cache", action="store_true", help="re-parse every model instead of using the cache")
+    parser.add_argument("--lazy", choices=sorted(LAZY_MODES), default="auto",
+                        help="read models with the low-memory STEP scanner: always, never, or auto for models of "
+                             f"{LAZY_LOAD_MIN_BYTES >> 20} MB or more (default: auto)")
+    parser.add_argument("--timings", metavar="FILE", help="write the stage / file timing summary to FILE as JSON")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="record cProfile stats of each model's parse and of the output writing into DIR")
+    parser.add_argument("--progress", action="store_true", help="print overall progress to stderr")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown_formats = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown_formats:
+        parser.error(f"unknown formats: {', '.join(unknown_formats)}")
+    entity_types = [name.strip() for name in (args.entity_types or "").split(",") if name.strip()]
+    if not args.list_parameters and not args.output_dir:
+        parser.error("output_dir is required unless --list-parameters is given")
+    if not os.path.isdir(args.input_dir):
+        print(f"Input directory not found: {args.input_dir}", file=sys.stderr)
+        return EXIT_ERROR
 
-app.mainloop()
+    try:
+        if args.list_parameters:
+            extract_and_save_parameters(args.input_dir, args.list_parameters, args.workers, lazy=LAZY_MODES[args.lazy])
+            return EXIT_OK
+
+        if args.properties:
+            load_selected_properties(args.properties)
+        else:
+            selected_properties = set()
+        progress = (lambda fraction, message: print(f"[{fraction:4.0%}] {message}", file=sys.stderr)) if args.progress else None
+        stats = PipelineStats(progress_callback=progress, profile_dir=args.profile)
+        outputs, failed_files = process_ifc_directory(args.input_dir, args.output_dir, args.workers,
+                                                      use_cache=not args.no_cache, formats=formats,
+                                                      properties=selected_properties, entity_types=entity_types,
+                                                      stats=stats, lazy=LAZY_MODES[args.lazy])
+        if args.timings:
+            stats.write_json(args.timings)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    if not outputs:
+        print("No output written.", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_PARTIAL if failed_files else EXIT_OK
+
+
+if __name__ == "__main__":
+    # Worker processes re-import this module, so only the launching process redirects logs and builds the GUI
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    if tk is None:
+        sys.exit("tkinter is not available; run with --help for the command-line interface.")
+    if getattr(sys, 'frozen', False):
+        log_errors_to_file()
+
+    # Create Tkinter app
+    app = tk.Tk()
+    app.title("IFC to CSV Converter - (CC) balaji.work")
+    app.geometry("600x700")
+
+    tk.Label(app, text="Created for Eastern Ring Road Project by Balaji Balagurusami babs@cowi.com for COWI A/S.", fg="blue").pack(pady=5)
+    tk.Label(app, text="License: Creative Commons 0 1.0 Universal", fg="blue").pack(pady=5)
+
+    def open_github():
+        webbrowser.open_new("https://github.com/balajibalagurusami/python/")
+
+    github_label = tk.Label(app, text="GitHub Repo", fg="blue", cursor="hand2")
+    github_label.pack(pady=5)
+    github_label.bind("<Button-1>", lambda e: open_github())
+
+    # Input directory
+    tk.Label(app, text="Select Input Directory:").pack()
+    input_dir_entry = tk.Entry(app, width=60)
+    input_dir_entry.pack(pady=5)
+    tk.Button(app, text="Browse", command=select_input_directory).pack()
+
+    # Output directory
+    tk.Label(app, text="Select Output Directory:").pack(pady=5)
+    output_dir_entry = tk.Entry(app, width=60)
+    output_dir_entry.pack(pady=5)
+    tk.Button(app, text="Browse", command=select_output_directory).pack()
+
+    # Property list selection
+    property_list_buttons = tk.Frame(app)
+    property_list_buttons.pack(pady=5)
+    tk.Button(property_list_buttons, text="Load Property List", command=select_property_list_file).pack(side="left", padx=5)
+    tk.Button(property_list_buttons, text="Save Property List", command=save_property_list_file).pack(side="left", padx=5)
+    property_file_label = tk.Label(app, text="No property list loaded.")
+    property_file_label.pack(pady=5)
+
+    # Searchable list of parameters; only the visible rows are drawn, however many there are
+    property_picker = PropertyPicker(app)
+    property_picker.pack(pady=10, padx=10, fill="both", expand=True)
+
+    def load_checkboxes():
+        # Keep parameters from a loaded property list checked
+        property_picker.set_properties(available_properties, checked=selected_properties)
+
+        # Enable the Start Processing button after loading checkboxes
+        start_button.config(state="normal")
+
+    # "Get Available Parameters" Button
+    parameters_button = tk.Button(app, text="Get Available Parameters", command=get_available_parameters)
+    parameters_button.pack(pady=5)
+
+    # Start and Cancel buttons and progress bar
+    buttons_frame = tk.Frame(app)
+    buttons_frame.pack(pady=10)
+    start_button = tk.Button(buttons_frame, text="Start Processing", command=start_processing, state="disabled")
+    start_button.pack(side="left", padx=5)
+    cancel_button = tk.Button(buttons_frame, text="Cancel", command=cancel_job, state="disabled")
+    cancel_button.pack(side="left", padx=5)
+    progress_var = tk.DoubleVar()
+    progress_bar = ttk.Progressbar(app, variable=progress_var, length=400)
+    progress_bar.pack(pady=5)
+    progress_label = tk.Label(app, text="")
+    progress_label.pack()
+
+    app.mainloop()
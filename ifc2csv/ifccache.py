@@ -0,0 +1,261 @@
+# (CC0) balaji.work
+# Sidecar cache so each IFC model is parsed once, however many times it is discovered or exported
+import hashlib
+import json
+import os
+import pickle
+
+from ccivalidation import iter_batches
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # Rows are cached as pickles when pyarrow isn't installed
+    pa = None
+
+# Errors from reading a damaged or truncated rows file, which then counts as a cache miss
+_ROWS_READ_ERRORS = (OSError, EOFError, pickle.UnpicklingError) + ((pa.ArrowException,) if pa is not None else ())
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ifc2csv", "cache")
+
+# Bump whenever the cached layout or the extracted rows change, so old entries are re-parsed
+CACHE_VERSION = 4
+
+# Rows per record batch (or pickled batch) of a rows file; stores and loads hold one batch at a time
+ROWS_BATCH_SIZE = 16384
+
+# Arrow types for property columns whose values all share one of these Python types
+_ARROW_TYPES = {str: "string", int: "int64", float: "float64", bool: "bool_"}
+
+
+class IfcFileCache:
+    """Per-model property index and extracted rows, keyed by the file's absolute path, size and mtime.
+
+    Each model gets two files in cache_dir: a JSON index, which doubles as the manifest entry
+    (size, mtime, every property name, property set names, columns, element count, and the
+    content hash when the model was parsed with verify_content),
+    and the extracted rows as a compressed Feather table, written and read back one batch of rows
+    at a time so a model's rows never have to fit in memory. An entry is returned while the model's
+    size and mtime still match; with verify_content, a model whose mtime changed but whose
+    content hash did not (e.g. re-issued as an identical copy) is still a hit.
+
+    Rows may be stored projected, i.e. extracted with only some properties and/or entity types.
+    The index records that projection, and an entry only answers requests it covers: a superset
+    of the requested properties and the same entity types. properties=None asks for every
+    property and entity_types=None for every IfcElement.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, verify_content=False):
+        self.cache_dir = cache_dir
+        self.verify_content = verify_content
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_key(ifc_file_path, with_hash=False):
+        stat = os.stat(ifc_file_path)
+        key = {"path": os.path.abspath(ifc_file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if with_hash:
+            key["sha256"] = _file_sha256(ifc_file_path)
+        return key
+
+    def _base_path(self, ifc_file_path):
+        digest = hashlib.sha1(os.path.abspath(ifc_file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def _rows_path(self, ifc_file_path):
+        return self._base_path(ifc_file_path) + (".rows.feather" if pa is not None else ".rows.pkl")
+
+    def get_index(self, ifc_file_path, properties=None, entity_types=None):
+        """Return the cached index dict for an unchanged model whose rows cover the projection, or None.
+
+        Pass properties=() when only the index itself (e.g. its property names) is needed.
+        """
+        index_path = self._base_path(ifc_file_path) + ".json"
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if index.get("version") != CACHE_VERSION or not _covers(index, properties, entity_types):
+            return None
+        key = self.file_key(ifc_file_path)
+        if all(index.get(name) == value for name, value in key.items()):
+            return index
+        if self.verify_content and index.get("size") == key["size"] and index.get("sha256") == _file_sha256(ifc_file_path):
+            # Same bytes under a new mtime: remember the new mtime so the next check is a plain stat
+            index["mtime_ns"] = key["mtime_ns"]
+            _write_atomic(index_path, json.dumps(index, ensure_ascii=False).encode("utf-8"))
+            return index
+        return None
+
+    def load_rows(self, ifc_file_path, properties=None, entity_types=None):
+        """Return the cached (element_data, columns) for an unchanged model, or None.
+
+        element_data is read from the rows file each time it is iterated, one batch at a time.
+        Rows stored with more properties than requested are narrowed to the requested ones.
+        """
+        index = self.get_index(ifc_file_path, properties, entity_types)
+        if index is None:
+            return None
+        rows_path = self._rows_path(ifc_file_path)
+        try:
+            # A rows file cut short or replaced since the index was written is a miss
+            if os.path.getsize(rows_path) != index["rows_size"]:
+                return None
+            if pa is not None:
+                with pa.memory_map(rows_path) as source:
+                    ipc.open_file(source)
+        except _ROWS_READ_ERRORS:
+            return None
+        columns = index["columns"]
+        unwanted = set()
+        if properties is not None:
+            # Drop stored properties that weren't asked for; GlobalId, Name and Type always stay
+            unwanted = set(index["properties"]).difference(properties, ("GlobalId", "Name", "Type")).intersection(columns)
+            columns = [column for column in columns if column not in unwanted]
+        return _CachedRows(rows_path, index["element_count"], unwanted), columns
+
+    def store(self, ifc_file_path, file_key, element_data, columns, property_names, property_sets,
+              properties=None, entity_types=None):
+        """Record a parsed model. file_key must be taken with file_key() before the model was opened.
+
+        element_data must be re-iterable (a list or RowSpool): with pyarrow it is read once to pick
+        the column types and once to write them.
+        properties and entity_types are the projection the rows were extracted with.
+        """
+        rows_path = self._rows_path(ifc_file_path)
+        # Rows first, then the index, so a readable index always has its rows next to it
+        temp_path = f"{rows_path}.{os.getpid()}.tmp"
+        if pa is not None:
+            schema = _rows_schema(element_data)
+            with ipc.new_file(temp_path, schema, options=ipc.IpcWriteOptions(compression="lz4")) as writer:
+                for rows in iter_batches(element_data, ROWS_BATCH_SIZE):
+                    writer.write_batch(_rows_to_batch(rows, schema))
+        else:
+            with open(temp_path, "wb") as f:
+                for rows in iter_batches(element_data, ROWS_BATCH_SIZE):
+                    pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, rows_path)
+
+        index = dict(file_key, version=CACHE_VERSION, properties=sorted(property_names), property_sets=sorted(property_sets),
+                     columns=list(columns), element_count=len(element_data), rows_size=os.path.getsize(rows_path),
+                     projection={"properties": _sorted_or_none(properties), "entity_types": _sorted_or_none(entity_types)})
+        _write_atomic(self._base_path(ifc_file_path) + ".json", json.dumps(index, ensure_ascii=False).encode("utf-8"))
+
+
+def _sorted_or_none(names):
+    return None if names is None else sorted(names)
+
+
+# Whether rows stored under an index include everything a request for properties / entity_types needs
+def _covers(index, properties, entity_types):
+    projection = index["projection"]
+    if projection["entity_types"] != _sorted_or_none(entity_types):
+        return False
+    if projection["properties"] is None:
+        return True
+    return properties is not None and set(properties).issubset(projection["properties"])
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class _CachedRows:
+    """The rows of one cache entry, read back from its rows file one batch at a time.
+
+    Properties in unwanted are dropped from every row.
+    """
+
+    def __init__(self, rows_path, element_count, unwanted):
+        self.rows_path = rows_path
+        self.element_count = element_count
+        self.unwanted = unwanted
+
+    def __len__(self):
+        return self.element_count
+
+    def __iter__(self):
+        for rows in _read_row_batches(self.rows_path):
+            if self.unwanted:
+                rows = [{name: value for name, value in row.items() if name not in self.unwanted} for row in rows]
+            yield from rows
+
+
+def _read_row_batches(rows_path):
+    if pa is not None:
+        with pa.memory_map(rows_path) as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield _batch_to_rows(reader.get_batch(i))
+        return
+    with open(rows_path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+# Arrow schema for element rows, one column per property. A column whose values all share one
+# of the _ARROW_TYPES is stored natively; anything else (mixed types, ints beyond int64, text
+# that isn't valid UTF-8) is pickled per value so rows come back exactly as extracted.
+def _rows_schema(element_data):
+    value_types = {}
+    for row in element_data:
+        for name, value in row.items():
+            types = value_types.setdefault(name, set())
+            if value is not None:
+                types.add(type(value) if _is_native(value) else object)
+    fields = []
+    for name, types in value_types.items():
+        if len(types) == 1 and next(iter(types)) in _ARROW_TYPES:
+            fields.append(pa.field(name, getattr(pa, _ARROW_TYPES[next(iter(types))])()))
+        else:
+            fields.append(pa.field(name, pa.binary(), metadata={b"encoding": b"pickle"}))
+    return pa.schema(fields)
+
+
+def _is_native(value):
+    if type(value) is int:
+        return -(1 << 63) <= value < 1 << 63
+    if type(value) is str and not value.isascii():
+        try:
+            value.encode("utf-8")
+        except UnicodeEncodeError:
+            return False
+    return True
+
+
+# One record batch of rows for a _rows_schema schema. Missing values are nulls.
+def _rows_to_batch(rows, schema):
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if field.metadata:
+            values = [None if value is None else pickle.dumps(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def _batch_to_rows(batch):
+    element_data = [{} for _ in range(batch.num_rows)]
+    for field, column in zip(batch.schema, batch.columns):
+        values = column.to_pylist()
+        if field.metadata and field.metadata.get(b"encoding") == b"pickle":
+            values = [None if value is None else pickle.loads(value) for value in values]
+        for row, value in zip(element_data, values):
+            if value is not None:
+                row[field.name] = value
+    return element_data
@@ -0,0 +1,148 @@
+# (CC0) balaji.work
+# Stage and per-file timers, counters, peak memory and progress reporting for an export run
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: psutil, when installed, reports the peak working set instead
+    resource = None
+
+
+class ExportCancelled(Exception):
+    """Raised between files or outputs once an export's cancel_event is set."""
+
+
+# Peak resident memory of this process in MB, or None where it can't be measured
+def peak_rss_mb():
+    if resource is not None:
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+class PipelineStats:
+    """Timings, counters and peak memory collected over one export.
+
+    Stages are timed with `with stats.stage(name):`. A stage entered several times accumulates,
+    and a dotted name (parse.open) is a part of the stage before the dot. Parser processes keep
+    their own PipelineStats and send back summary(), which merge() adds in, so their stages are
+    summed over processes rather than wall time.
+
+    progress_callback(fraction, message) gets the overall progress from 0 to 1. It is called on
+    the thread doing the work, once per file or output, and must return quickly.
+    With profile_dir, each profile(name) block is recorded with cProfile to profile_dir/name.prof.
+    cancel_event (a threading.Event) lets another thread stop the run at the next check_cancelled().
+    """
+
+    def __init__(self, progress_callback=None, profile_dir=None, cancel_event=None):
+        self.progress_callback = progress_callback
+        self.profile_dir = profile_dir
+        self.cancel_event = cancel_event
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.files = []
+        self.worker_peak_rss_mb = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_stage(name, time.perf_counter() - start, 1)
+            # ru_maxrss only grows, so the first stage showing a jump is where the memory went
+            self.stages[name]["peak_rss_mb"] = peak_rss_mb()
+
+    def _add_stage(self, name, seconds, calls):
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "peak_rss_mb": None})
+        stage["seconds"] += seconds
+        stage["calls"] += calls
+
+    @contextmanager
+    def profile(self, name):
+        if not self.profile_dir:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_file(self, path, seconds, elements, cached=False, error=None):
+        self.files.append({"path": path, "seconds": seconds, "elements": elements, "cached": cached, "error": error})
+
+    def progress(self, fraction, message):
+        if self.progress_callback:
+            self.progress_callback(min(max(fraction, 0.0), 1.0), message)
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ExportCancelled()
+
+    # Add the summary() of a PipelineStats kept in a parser process
+    def merge(self, summary):
+        for name, stage in summary["stages"].items():
+            self._add_stage(name, stage["seconds"], stage["calls"])
+        for name, amount in summary["counters"].items():
+            self.count(name, amount)
+        if summary["pid"] != os.getpid():
+            peaks = [peak for peak in (self.worker_peak_rss_mb, summary["peak_rss_mb"]) if peak is not None]
+            self.worker_peak_rss_mb = max(peaks) if peaks else None
+
+    def summary(self):
+        return {
+            "pid": os.getpid(),
+            "total_seconds": time.perf_counter() - self.started,
+            "stages": self.stages,
+            "counters": self.counters,
+            "files": self.files,
+            "peak_rss_mb": peak_rss_mb(),
+            "worker_peak_rss_mb": self.worker_peak_rss_mb,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    # Human-readable timing table, as printed at the end of an export
+    def format_summary(self, slowest_files=5):
+        summary = self.summary()
+        lines = [f"Timing summary ({summary['total_seconds']:.1f} s total)"]
+        # Parts finish before their stage does, so list each stage first and its parts under it
+        root_order = {}
+        for name in self.stages:
+            root_order.setdefault(name.split(".")[0], len(root_order))
+        position = {name: index for index, name in enumerate(self.stages)}
+        for name in sorted(self.stages, key=lambda name: (root_order[name.split(".")[0]], name.count("."), position[name])):
+            stage = self.stages[name]
+            indent = "  " * name.count(".")
+            lines.append(f"  {indent}{name:<{30 - len(indent)}}{stage['seconds']:>10.2f} s  x{stage['calls']}")
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name}: {amount}" for name, amount in sorted(self.counters.items())))
+        timed_files = sorted((f for f in self.files if f["seconds"] is not None), key=lambda f: f["seconds"], reverse=True)
+        for f in timed_files[:slowest_files]:
+            lines.append(f"  {f['seconds']:>8.2f} s  {f['elements']:>8} elements  {f['path']}{' (cached)' if f['cached'] else ''}")
+        memory = [f"{label} {value:.0f} MB" for label, value in (("peak RSS", summary["peak_rss_mb"]),
+                                                                   ("parser peak RSS", summary["worker_peak_rss_mb"]))
+                  if value is not None]
+        if memory:
+            lines.append("  " + ", ".join(memory))
+        return "\n".join(lines)
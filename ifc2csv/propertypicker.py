@@ -0,0 +1,137 @@
+# (CC0) balaji.work
+# Searchable, checkable property list for the GUI that stays fast with thousands of properties
+import tkinter as tk
+from tkinter import ttk
+
+CHECKED_MARK = "☑ "
+UNCHECKED_MARK = "☐ "
+
+# Rows inserted per idle callback when (re)filling the list, so the window never stalls
+FILL_CHUNK = 1000
+
+# Delay after the last keystroke before the search is applied
+SEARCH_DELAY_MS = 150
+
+
+class PropertyPicker(ttk.Frame):
+    """Property names in a ttk.Treeview with a search box and a check mark per row.
+
+    The Treeview only draws the rows in view and the checked names are kept in one set, instead
+    of a Checkbutton and BooleanVar per property. Click a row, or select rows and press Space,
+    to toggle them.
+    """
+
+    def __init__(self, master, height=15):
+        super().__init__(master)
+        self.names = []
+        self.checked_names = set()
+        self._shown = []
+        self._row_names = {}
+        self._fill_job = None
+        self._search_job = None
+
+        search_row = ttk.Frame(self)
+        search_row.pack(fill="x")
+        ttk.Label(search_row, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self._schedule_search())
+        ttk.Entry(search_row, textvariable=self.search_var).pack(side="left", fill="x", expand=True, padx=5)
+
+        list_frame = ttk.Frame(self)
+        list_frame.pack(fill="both", expand=True, pady=5)
+        self.tree = ttk.Treeview(list_frame, show="tree", selectmode="extended", height=height)
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<space>", self._on_space)
+
+        button_row = ttk.Frame(self)
+        button_row.pack(fill="x")
+        ttk.Button(button_row, text="Check shown", command=lambda: self._set_shown(True)).pack(side="left")
+        ttk.Button(button_row, text="Uncheck shown", command=lambda: self._set_shown(False)).pack(side="left", padx=5)
+        self.count_label = ttk.Label(button_row, text="")
+        self.count_label.pack(side="right")
+
+    # Replace the listed names; names in checked start checked
+    def set_properties(self, names, checked=()):
+        self.names = list(names)
+        self.checked_names = set(checked).intersection(self.names)
+        self._apply_search()
+
+    # Check exactly the listed names among the available ones, e.g. from a property list file
+    def set_checked(self, names):
+        self.checked_names = set(names).intersection(self.names)
+        for row, name in self._row_names.items():
+            self.tree.item(row, text=self._row_text(name))
+        self._update_count()
+
+    def checked(self):
+        return set(self.checked_names)
+
+    def _row_text(self, name):
+        return (CHECKED_MARK if name in self.checked_names else UNCHECKED_MARK) + name
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._apply_search)
+
+    def _apply_search(self):
+        self._search_job = None
+        if self._fill_job is not None:
+            self.after_cancel(self._fill_job)
+            self._fill_job = None
+        self.tree.delete(*self.tree.get_children())
+        self._row_names = {}
+        text = self.search_var.get().strip().lower()
+        self._shown = [name for name in self.names if text in name.lower()] if text else self.names
+        self._update_count()
+        self._fill(0)
+
+    def _fill(self, start):
+        for name in self._shown[start:start + FILL_CHUNK]:
+            self._row_names[self.tree.insert("", "end", text=self._row_text(name))] = name
+        if start + FILL_CHUNK < len(self._shown):
+            self._fill_job = self.after(1, self._fill, start + FILL_CHUNK)
+        else:
+            self._fill_job = None
+
+    def _toggle(self, rows):
+        rows = [row for row in rows if row in self._row_names]
+        if not rows:
+            return
+        # Rows that are all checked get unchecked; otherwise they all get checked
+        check = not all(self._row_names[row] in self.checked_names for row in rows)
+        for row in rows:
+            name = self._row_names[row]
+            if check:
+                self.checked_names.add(name)
+            else:
+                self.checked_names.discard(name)
+            self.tree.item(row, text=self._row_text(name))
+        self._update_count()
+
+    # Check or uncheck every name matching the search, including rows not inserted yet
+    def _set_shown(self, check):
+        if check:
+            self.checked_names.update(self._shown)
+        else:
+            self.checked_names.difference_update(self._shown)
+        for row, name in self._row_names.items():
+            self.tree.item(row, text=self._row_text(name))
+        self._update_count()
+
+    def _on_click(self, event):
+        row = self.tree.identify_row(event.y)
+        # Plain clicks toggle; Shift / Ctrl clicks only extend the selection for Space
+        if row and not event.state & 0x0005:
+            self._toggle([row])
+
+    def _on_space(self, _event):
+        self._toggle(self.tree.selection())
+        return "break"
+
+    def _update_count(self):
+        self.count_label.config(text=f"{len(self.checked_names)} checked, {len(self._shown)} of {len(self.names)} shown")
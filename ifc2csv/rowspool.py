@@ -0,0 +1,90 @@
+# (CC0) balaji.work
+# On-disk buffer so exports never hold every element of a project in memory
+import os
+import pickle
+import tempfile
+
+
+class RowSpool:
+    """Append-only buffer of element row dicts backed by an anonymous temporary file.
+
+    Rows are pickled in batches of batch_size, so only one batch is held in memory while
+    appending and while iterating back over the rows. Iterating can be repeated.
+    With a path the rows go to that file instead, which is kept on close so another process
+    can read them back as SpooledRows(path, len(spool)).
+    """
+
+    def __init__(self, batch_size=5000, path=None):
+        self.batch_size = batch_size
+        self.path = path
+        self._file = open(path, "w+b") if path else tempfile.TemporaryFile()
+        self._batch = []
+        self._count = 0
+
+    def append(self, row):
+        self._batch.append(row)
+        self._count += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        if self._batch:
+            self._file.seek(0, os.SEEK_END)
+            pickle.dump(self._batch, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._batch = []
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        self.flush()
+        self._file.seek(0)
+        yield from _read_rows(self._file)
+
+    def close(self):
+        if self.path:
+            self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SpooledRows:
+    """The rows a RowSpool left in its file, read back one batch at a time.
+
+    Only the path and row count are pickled, so it can be returned from a worker process.
+    """
+
+    def __init__(self, path, count):
+        self.path = path
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            yield from _read_rows(f)
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _read_rows(f):
+    while True:
+        try:
+            batch = pickle.load(f)
+        except EOFError:
+            return
+        yield from batch
@@ -0,0 +1,422 @@
+# (CC0) balaji.work
+# Low-memory reader for very large IFC files: streams the STEP text once, keeps a small index of
+# file offsets, and reads each element, property set and property back from disk when it is exported
+import re
+from array import array
+from collections import namedtuple
+
+import numpy as np
+from ifcopenshell import ifcopenshell_wrapper
+
+from instrumentation import PipelineStats
+
+# "#123=IFCWALL(" at the start of a data section statement
+_ENTITY = re.compile(rb"\s*#(\d+)\s*=\s*([A-Za-z0-9_]+)\s*\(")
+_FILE_SCHEMA = re.compile(rb"FILE_SCHEMA\s*\(\s*\(\s*'([^']*)'")
+_DATA_SECTION = re.compile(rb"ENDSEC\s*;\s*DATA\s*;")
+_ENDSEC = re.compile(rb"\s*ENDSEC\s*;")
+
+# Quotes and comment delimiters, which decide whether a ";" ends a statement
+_STRING_OR_COMMENT = re.compile(rb"'|/\*|\*/")
+
+# Bytes read from the file at a time while scanning
+READ_CHUNK = 1 << 20
+
+# One STEP parameter token and the separators before it; the matched group says which kind
+_TOKEN = re.compile(rb"""[\s,]*(?:
+      '((?:[^']|'')*)'                                  # 1 string
+    | \#(\d+)                                           # 2 entity reference
+    | \.([A-Za-z0-9_]+)\.                               # 3 enumeration
+    | "([0-9A-Fa-f]*)"                                  # 4 binary
+    | ([+-]?(?:\d+\.?\d*|\.\d+)(?:[Ee][+-]?\d+)?)       # 5 number
+    | ([A-Za-z_][A-Za-z0-9_]*)\s*\(                     # 6 typed value, e.g. IFCLABEL(
+    | (\()                                              # 7 list
+    | (\))                                              # 8 end of typed value or list
+    | ([$*])                                            # 9 unset or derived
+)""", re.X)
+
+# Control directives inside STEP strings
+_STRING_ESCAPE = re.compile(r"\\X2\\((?:[0-9A-Fa-f]{4})*)\\X0\\|\\X4\\((?:[0-9A-Fa-f]{8})*)\\X0\\"
+                            r"|\\X\\([0-9A-Fa-f]{2})|\\S\\(.)|\\P[A-I]\\|\\\\", re.S)
+
+_ENUMERATIONS = {b"T": True, b"F": False, b"U": "UNKNOWN"}
+
+# Attribute positions, the same in IFC2X3, IFC4 and IFC4X3
+_GLOBAL_ID, _NAME = 0, 2                     # IfcRoot
+_RELATED_OBJECTS, _RELATING_DEFINITION = 4, 5  # IfcRelDefinesByProperties
+_HAS_PROPERTIES = 4                          # IfcPropertySet
+_PROPERTY_NAME, _NOMINAL_VALUE = 0, 2        # IfcProperty / IfcPropertySingleValue
+
+_Typed = namedtuple("_Typed", "type value")
+
+
+class _Reference(int):
+    """An #id entity reference among the parsed parameters."""
+
+
+# Type names (upper case) of a schema class and all its subtypes, in the order ifcopenshell's
+# by_type() returns them: the class itself, then each subtype's tree in schema order
+def _subtype_names(schema, class_name):
+    names = []
+
+    def walk(declaration):
+        names.append(declaration.name().upper())
+        for subtype in declaration.subtypes():
+            walk(subtype)
+
+    walk(schema.declaration_by_name(class_name))
+    return names
+
+
+def _decode_string(raw):
+    # Like ifcopenshell, bytes outside ASCII are dropped; characters beyond it must be escaped
+    text = raw.decode("ascii", "ignore").replace("''", "'")
+    return _STRING_ESCAPE.sub(_unescape, text) if "\\" in text else text
+
+
+def _unescape(match):
+    utf16, utf32, latin1, shifted = match.groups()
+    if utf16 is not None:
+        return bytes.fromhex(utf16).decode("utf-16-be")
+    if utf32 is not None:
+        return "".join(chr(int(utf32[i:i + 8], 16)) for i in range(0, len(utf32), 8))
+    if latin1 is not None:
+        return chr(int(latin1, 16))
+    if shifted is not None:
+        return chr(ord(shifted) + 128)
+    return "" if match.group(0) != "\\\\" else "\\"
+
+
+# A STEP binary as ifcopenshell returns it: a bit string without the padding bits, whose count
+# is the first hex digit
+def _decode_binary(digits):
+    bits = "".join(f"{int(digit, 16):04b}" for digit in digits[1:].decode("ascii"))
+    padding = int(digits[:1] or b"0", 16)
+    return bits[:len(bits) - padding] if padding else bits
+
+
+# Parse an entity's parameter list from pos, just after its opening bracket, into Python values:
+# strings, ints and floats (by how the number is written), _Reference, _Typed, tuples and None
+def _parse_parameters(statement, pos):
+    lists = [[]]
+    typed = [None]
+    while True:
+        match = _TOKEN.match(statement, pos)
+        if match is None:
+            raise ValueError(f"Cannot parse STEP parameters: {statement[:80]!r}")
+        pos = match.end()
+        kind = match.lastindex
+        value = match.group(kind)
+        if kind == 1:
+            lists[-1].append(_decode_string(value))
+        elif kind == 2:
+            lists[-1].append(_Reference(value))
+        elif kind == 3:
+            lists[-1].append(_ENUMERATIONS.get(value, value.decode("ascii")))
+        elif kind == 4:
+            lists[-1].append(_decode_binary(value))
+        elif kind == 5:
+            lists[-1].append(float(value) if b"." in value or b"E" in value.upper() else int(value))
+        elif kind in (6, 7):
+            lists.append([])
+            typed.append(value.decode("ascii") if kind == 6 else None)
+        elif kind == 8:
+            items = lists.pop()
+            type_name = typed.pop()
+            if not lists:
+                return items
+            if type_name is None:
+                lists[-1].append(tuple(items))
+            else:
+                lists[-1].append(_Typed(type_name, items[0] if len(items) == 1 else tuple(items)))
+        else:
+            lists[-1].append(None)
+
+
+# Return (ends in plain text, text without /* */ comments) for the start of a statement, skipping
+# quotes and comment delimiters inside strings and comments
+def _split_comments(text):
+    in_string = in_comment = False
+    kept, start = [], 0
+    for match in _STRING_OR_COMMENT.finditer(text):
+        token = match.group()
+        if in_comment:
+            if token == b"*/":
+                in_comment, start = False, match.end()
+        elif token == b"'":
+            in_string = not in_string
+        elif token == b"/*" and not in_string:
+            kept.append(text[start:match.start()])
+            in_comment = True
+    if not in_comment:
+        kept.append(text[start:])
+    return not (in_string or in_comment), b"".join(kept)
+
+
+def _strip_comments(statement):
+    return _split_comments(statement)[1] if b"/*" in statement else statement
+
+
+# Index just past the ";" ending the statement that starts at pos, or None if the buffer ends first
+def _statement_end(buffer, pos):
+    search = pos
+    while True:
+        semicolon = buffer.find(b";", search)
+        if semicolon == -1:
+            return None
+        text = buffer[pos:semicolon]
+        # Quotes inside strings come in pairs, so an even count means the ";" is outside them
+        if b"/*" in text:
+            outside = _split_comments(text)[0]
+        else:
+            outside = text.count(b"'") % 2 == 0
+        if outside:
+            return semicolon + 1
+        search = semicolon + 1
+
+
+# The value ifcopenshell's NominalValue.wrappedValue gives for a parsed IfcValue
+def _wrapped_value(value, property_id):
+    if not isinstance(value, _Typed):
+        raise ValueError(f"Property #{property_id} has no typed NominalValue")
+    return value.value
+
+
+def _int64s(values):
+    return np.frombuffer(values, dtype=np.int64) if values else np.empty(0, dtype=np.int64)
+
+
+class _OffsetIndex:
+    """Entity ids with the byte offset and length of their statement.
+
+    Filled with add() during the scan; freeze(order) turns the columns into numpy arrays, in
+    the given order or sorted by id for locate().
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.offsets = array("q")
+        self.lengths = array("q")
+
+    def add(self, entity_id, offset, length):
+        self.ids.append(entity_id)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+
+    def freeze(self, order=None):
+        ids, offsets, lengths = _int64s(self.ids), _int64s(self.offsets), _int64s(self.lengths)
+        order = np.argsort(ids, kind="stable") if order is None else order
+        self.ids, self.offsets, self.lengths = ids[order], offsets[order], lengths[order]
+        return self
+
+    def __len__(self):
+        return len(self.ids)
+
+    def locate(self, entity_id):
+        return self.locate_all([entity_id])[0]
+
+    # (offset, length) of each id, or None for ids not in the index
+    def locate_all(self, entity_ids):
+        if not len(self.ids):
+            return [None] * len(entity_ids)
+        entity_ids = np.asarray(entity_ids, dtype=np.int64)
+        positions = np.minimum(self.ids.searchsorted(entity_ids), len(self.ids) - 1)
+        found = (self.ids[positions] == entity_ids).tolist()
+        return [location if ok else None for location, ok in
+                zip(zip(self.offsets[positions].tolist(), self.lengths[positions].tolist()), found)]
+
+
+class StepPropertyScanner:
+    """Index of an IFC file's elements, property sets and properties built in one streaming pass.
+
+    Only ids, byte offsets and the element / property set pairs of IfcRelDefinesByProperties are
+    kept in memory, in numpy arrays, so memory grows with the number of entities indexed rather
+    than with the size of the model. Statements are read back from the file as they are needed.
+    Statements are split at each ";" outside strings and /* */ comments, however they are laid
+    out over lines; one that is not a plain "#id=ENTITY(...)" instance raises ValueError rather
+    than being skipped.
+    """
+
+    def __init__(self, ifc_file_path, entity_types=None):
+        self.path = ifc_file_path
+        self._file = open(ifc_file_path, "rb")
+        try:
+            self.schema = ifcopenshell_wrapper.schema_by_name(self._read_schema_name())
+        except Exception:
+            self._file.close()
+            raise
+
+        element_types = _subtype_names(self.schema, "IfcElement")
+        if entity_types:
+            wanted = set()
+            for entity_type in entity_types:
+                try:
+                    wanted.update(_subtype_names(self.schema, entity_type))
+                except RuntimeError:
+                    pass  # not a class of this schema, so no element is one
+            element_types = [name for name in element_types if name in wanted]
+        self._element_rank = {name: rank for rank, name in enumerate(element_types)}
+        self._type_names = {name: self.schema.declaration_by_name(name).name() for name in element_types}
+        self._rel_rank = {name: rank for rank, name in enumerate(_subtype_names(self.schema, "IfcRelDefinesByProperties"))}
+        self._property_set_types = set(_subtype_names(self.schema, "IfcPropertySet"))
+        self._property_types = set(_subtype_names(self.schema, "IfcProperty"))
+        self._single_value_types = set(_subtype_names(self.schema, "IfcPropertySingleValue"))
+
+    def close(self):
+        self._file.close()
+
+    def _read_schema_name(self):
+        header = b""
+        while True:
+            chunk = self._file.read(READ_CHUNK)
+            if not chunk:
+                raise ValueError(f"No DATA section in {self.path}")
+            header += chunk
+            data = _DATA_SECTION.search(header)
+            if data is not None:
+                break
+        self._data_offset = data.end()
+        match = _FILE_SCHEMA.search(header, 0, data.start())
+        if match is None:
+            raise ValueError(f"No FILE_SCHEMA in the header of {self.path}")
+        return match.group(1).decode("ascii")
+
+    # Yield (offset, length, statement without comments) for each instance of the data section
+    def _statements(self):
+        self._file.seek(self._data_offset)
+        buffer, buffer_offset, pos = b"", self._data_offset, 0
+        while True:
+            end = _statement_end(buffer, pos)
+            if end is None:
+                chunk = self._file.read(READ_CHUNK)
+                if not chunk:
+                    raise ValueError(f"No ENDSEC at the end of the DATA section of {self.path}")
+                buffer, buffer_offset, pos = buffer[pos:] + chunk, buffer_offset + pos, 0
+                continue
+            statement = _strip_comments(buffer[pos:end])
+            if _ENDSEC.match(statement):
+                return
+            yield buffer_offset + pos, end - pos, statement
+            pos = end
+
+    # The streaming pass: note where each element, property set and property is, and which
+    # property sets each object is related to
+    def scan(self):
+        elements = _OffsetIndex()
+        element_ranks = array("q")
+        property_sets = _OffsetIndex()
+        properties = _OffsetIndex()
+        pair_objects, pair_sets, pair_order = array("q"), array("q"), array("q")
+
+        for offset, length, statement in self._statements():
+            match = _ENTITY.match(statement)
+            if match is None:
+                # e.g. a complex instance "#1=(A()B());", which this reader can't place in the index
+                raise ValueError(f"Cannot read STEP statement in {self.path} at byte {offset}: {statement[:80]!r}")
+            type_name = match.group(2).upper().decode("ascii")
+            if type_name in self._property_types:
+                properties.add(int(match.group(1)), offset, length)
+            elif type_name in self._element_rank:
+                elements.add(int(match.group(1)), offset, length)
+                element_ranks.append(self._element_rank[type_name])
+            elif type_name in self._property_set_types:
+                property_sets.add(int(match.group(1)), offset, length)
+            elif type_name in self._rel_rank:
+                parameters = _parse_parameters(statement, match.end())
+                relating = parameters[_RELATING_DEFINITION]
+                if not isinstance(relating, _Reference):
+                    continue  # an IFC4 set of property set definitions has no HasProperties
+                # Relationships are visited by type, then id, like by_type("IfcRelDefinesByProperties")
+                order = (self._rel_rank[type_name] << 40) | int(match.group(1))
+                for related_object in parameters[_RELATED_OBJECTS] or ():
+                    pair_objects.append(related_object)
+                    pair_sets.append(relating)
+                    pair_order.append(order)
+
+        # Elements by type, then id, like by_type("IfcElement")
+        self._elements = elements.freeze(np.lexsort((_int64s(elements.ids), _int64s(element_ranks))))
+        self._property_sets = property_sets.freeze()
+        self._properties = properties.freeze()
+
+        objects, sets, order = _int64s(pair_objects), _int64s(pair_sets), _int64s(pair_order)
+        # Only relationships to an IfcPropertySet count, which is known once the whole file is read
+        keep = np.isin(sets, self._property_sets.ids)
+        objects, sets, order = objects[keep], sets[keep], order[keep]
+        by_object = np.lexsort((order, objects))
+        self._pair_objects, self._pair_sets = objects[by_object], sets[by_object]
+        set_ids, uses = np.unique(self._pair_sets, return_counts=True)
+        self._shared_sets = set(set_ids[uses > 1].tolist())
+        return self
+
+    def element_count(self):
+        return len(self._elements)
+
+    def _read(self, location):
+        offset, length = location
+        self._file.seek(offset)
+        statement = _strip_comments(self._file.read(length))
+        match = _ENTITY.match(statement)
+        return match.group(2).upper().decode("ascii"), _parse_parameters(statement, match.end())
+
+    # Yield (entity id, IFC class name, GlobalId, Name) for each element, in by_type("IfcElement") order
+    def iter_elements(self):
+        elements = self._elements
+        for element_id, offset, length in zip(elements.ids.tolist(), elements.offsets.tolist(), elements.lengths.tolist()):
+            type_name, parameters = self._read((offset, length))
+            yield element_id, self._type_names[type_name], parameters[_GLOBAL_ID], parameters[_NAME]
+
+    # Property set ids related to an object, in the order of its IsDefinedBy
+    def property_sets_of(self, object_id):
+        start = self._pair_objects.searchsorted(object_id, "left")
+        end = self._pair_objects.searchsorted(object_id, "right")
+        return self._pair_sets[start:end].tolist()
+
+    def is_shared(self, property_set_id):
+        return property_set_id in self._shared_sets
+
+    # (Name, {property name: value}, every property name) of an IfcPropertySet, with only the
+    # values of names in only_properties unless it is None, as ifc2csv._decode_property_set does
+    def decode_property_set(self, property_set_id, only_properties=None):
+        _, parameters = self._read(self._property_sets.locate(property_set_id))
+        values = {}
+        names = []
+        property_ids = parameters[_HAS_PROPERTIES] or ()
+        for property_id, location in zip(property_ids, self._properties.locate_all(property_ids)):
+            if location is None:
+                continue
+            type_name, prop = self._read(location)
+            name = prop[_PROPERTY_NAME]
+            names.append(name)
+            if (only_properties is None or name in only_properties) and type_name in self._single_value_types:
+                values[name] = _wrapped_value(prop[_NOMINAL_VALUE], property_id)
+        return parameters[_NAME], values, names
+
+
+# Yield the same property dicts as ifc2csv.iter_ifc_properties, without loading the model.
+# Property sets shared by several elements are decoded once; the rest are read when used and
+# then dropped, so memory stays at the scanner's index plus one element.
+def iter_step_properties(ifc_file_path, all_columns, property_names=None, property_sets=None,
+                         only_properties=None, entity_types=None, stats=None):
+    stats = stats if stats is not None else PipelineStats()
+    scanner = StepPropertyScanner(ifc_file_path, entity_types)
+    try:
+        with stats.stage("parse.scan"):
+            scanner.scan()
+        decoded_sets = {}
+        for element_id, element_type, global_id, name in scanner.iter_elements():
+            properties = {"GlobalId": global_id, "Name": name if name else "Unknown", "Type": element_type}
+            for property_set_id in scanner.property_sets_of(element_id):
+                values = decoded_sets.get(property_set_id)
+                if values is None:
+                    set_name, values, names = scanner.decode_property_set(property_set_id, only_properties)
+                    if scanner.is_shared(property_set_id):
+                        decoded_sets[property_set_id] = values
+                    all_columns.update(values)
+                    if property_names is not None:
+                        property_names.update(names)
+                    if property_sets is not None:
+                        property_sets.add(set_name)
+                properties.update(values)
+            yield properties
+    finally:
+        scanner.close()